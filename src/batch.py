@@ -1,40 +1,309 @@
 import sys
 sys.dont_write_bytecode = True
 
-import random
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 import config
+from core.checkpoint import load_checkpoint, save_checkpoint
+from core.settings import Settings
 from core.simulator import GenesisSimulator
+from core.stats import StatsCollector
 
 
-def run_once(seed: int, max_ticks: int, output_dir: str) -> None:
-    random.seed(seed)
+def run_once(
+    seed: int,
+    max_ticks: int,
+    output_dir: str,
+    timings: bool = False,
+    opcode_profile: bool = False,
+    strips: int = 1,
+    settings: Settings | None = None,
+    resume: str | None = None,
+    checkpoint_at: int | None = None,
+) -> dict:
+    # With resume the run continues the given checkpoint, drawing its
+    # randomness from `seed` from there on, so every seed of a batch forks
+    # the same warmed up world.
+    started = time.perf_counter()
 
-    sim = GenesisSimulator()
-    sim.reset()
+    if strips > 1:
+        # Phase timings and opcode profiles are only recorded for worlds
+        # stepped in this process, so main() rejects them with strips.
+        from core.tiled import TiledSimulator
+        sim = TiledSimulator(strips, settings)
+    else:
+        if resume is not None:
+            sim = load_checkpoint(resume, settings, seed)
+        else:
+            sim = GenesisSimulator(settings)
+        if timings:
+            sim.enable_phase_timing()
+        if opcode_profile:
+            sim.enable_opcode_profiling()
+    sim.stats = StatsCollector(history_limit=0)
+    if resume is None:
+        sim.reset(seed)
+    sim.stats.stream_to(Path(output_dir) / f"seed_{seed}.csv")
+    if getattr(sim, "opcode_profiler", None) is not None:
+        sim.opcode_profiler.stream_histogram_to(Path(output_dir) / f"seed_{seed}_opcodes.csv")
 
-    while sim.running and sim.tick < max_ticks:
-        sim.step()
-        if sim.is_extinct():
-            break
+    try:
+        while sim.running and sim.tick < max_ticks:
+            sim.step()
+            if sim.tick == checkpoint_at:
+                save_checkpoint(sim, Path(output_dir) / f"seed_{seed}_tick_{sim.tick}.ckpt")
+            if sim.is_extinct():
+                break
+    finally:
+        sim.stats.close()
+        if getattr(sim, "opcode_profiler", None) is not None:
+            sim.opcode_profiler.close()
+        if strips > 1:
+            sim.close()
 
-    output_path = Path(output_dir) / f"seed_{seed}.csv"
-    sim.stats.export_history_csv(output_path)
+    if getattr(sim, "timer", None) is not None:
+        sim.timer.export_csv(Path(output_dir) / f"seed_{seed}_timings.csv")
+    if getattr(sim, "opcode_profiler", None) is not None:
+        sim.opcode_profiler.export_summary_csv(Path(output_dir) / f"seed_{seed}_opcode_costs.csv")
 
-    print(f"Completed  Seed = {seed}  Tick = {sim.tick}  Extinct = {sim.is_extinct()}")
+    # Tiled runs may have bounded predator_max_step, so the result records
+    # the step the run actually used.
+    return {
+        "seed": seed,
+        "tick": sim.tick,
+        "extinct": sim.is_extinct(),
+        "elapsed": time.perf_counter() - started,
+        "predator_max_step": sim.settings.predator_max_step,
+    }
 
 
-def main() -> None:
-    seed = int(input("Seed: ").strip())
-    runs = int(input("Runs: ").strip())
+def run_ensemble(
+    seeds: list[int],
+    max_ticks: int,
+    output_dir: str,
+    settings: Settings | None = None,
+) -> list[dict]:
+    # The runs of run_once for every seed, stepped in lockstep as one
+    # ensemble on the numpy grid backend.
+    from core.ensemble import EnsembleSimulator
 
-    max_ticks = config.MAX_TICK_COUNT
-    output_dir = "results"
+    started = time.perf_counter()
+    ensemble = EnsembleSimulator(seeds, settings)
+    for world in ensemble.worlds:
+        world.stats = StatsCollector(history_limit=0)
+    ensemble.reset()
+    for seed, world in zip(seeds, ensemble.worlds):
+        world.stats.stream_to(Path(output_dir) / f"seed_{seed}.csv")
 
-    for i in range(runs):
-        current_seed = seed + i
-        run_once(current_seed, max_ticks, output_dir)
+    try:
+        while ensemble.running and ensemble.tick < max_ticks:
+            ensemble.step()
+    finally:
+        for world in ensemble.worlds:
+            world.stats.close()
+
+    elapsed = time.perf_counter() - started
+    return [
+        {
+            "seed": seed,
+            "tick": world.tick,
+            "extinct": world.is_extinct(),
+            "elapsed": elapsed,
+            "predator_max_step": world.settings.predator_max_step,
+        }
+        for seed, world in zip(seeds, ensemble.worlds)
+    ]
+
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m{seconds:02d}s"
+    if minutes:
+        return f"{minutes}m{seconds:02d}s"
+    return f"{seconds}s"
+
+
+def _report(result: dict, done: int, total: int, total_ticks: int, started: float) -> None:
+    elapsed = time.perf_counter() - started
+    remaining = elapsed / done * (total - done)
+    throughput = total_ticks / elapsed if elapsed > 0 else 0.0
+
+    step = result["predator_max_step"]
+    print(
+        f"[{done}/{total}]  Seed = {result['seed']}  Tick = {result['tick']}  "
+        f"Extinct = {result['extinct']}  "
+        f"Predator step = {'unbounded' if step is None else step}  "
+        f"Ticks/s = {throughput:.1f}  ETA = {_format_duration(remaining)}",
+        flush=True,
+    )
+
+
+def run_batch(
+    seeds: list[int],
+    max_ticks: int,
+    output_dir: str,
+    workers: int,
+    timings: bool = False,
+    opcode_profile: bool = False,
+    strips: int = 1,
+    settings: Settings | None = None,
+    ensemble: bool = False,
+    resume: str | None = None,
+    checkpoint_at: int | None = None,
+) -> list[dict]:
+    # Every run draws only from random streams keyed by its own seed, so a
+    # run's CSV does not depend on which process executes it or in what
+    # order runs finish.
+    started = time.perf_counter()
+    results = []
+    total_ticks = 0
+
+    if ensemble:
+        # Each worker steps its share of the seeds as one ensemble, reported
+        # as soon as that ensemble finishes.
+        groups = [seeds[i::workers] for i in range(workers)]
+        if workers <= 1:
+            for group in groups:
+                for result in run_ensemble(group, max_ticks, output_dir, settings):
+                    results.append(result)
+                    total_ticks += result["tick"]
+                    _report(result, len(results), len(seeds), total_ticks, started)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(run_ensemble, group, max_ticks, output_dir, settings)
+                    for group in groups
+                ]
+                for future in as_completed(futures):
+                    for result in future.result():
+                        results.append(result)
+                        total_ticks += result["tick"]
+                        _report(result, len(results), len(seeds), total_ticks, started)
+    elif workers <= 1:
+        for seed in seeds:
+            result = run_once(
+                seed, max_ticks, output_dir, timings, opcode_profile, strips, settings,
+                resume, checkpoint_at,
+            )
+            results.append(result)
+            total_ticks += result["tick"]
+            _report(result, len(results), len(seeds), total_ticks, started)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    run_once, seed, max_ticks, output_dir, timings, opcode_profile, strips, settings,
+                    resume, checkpoint_at,
+                )
+                for seed in seeds
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                total_ticks += result["tick"]
+                _report(result, len(results), len(seeds), total_ticks, started)
+
+    elapsed = time.perf_counter() - started
+    throughput = total_ticks / elapsed if elapsed > 0 else 0.0
+    print(
+        f"Finished  Runs = {len(results)}  Ticks = {total_ticks}  "
+        f"Time = {_format_duration(elapsed)}  Ticks/s = {throughput:.1f}"
+    )
+
+    results.sort(key=lambda result: result["seed"])
+    return results
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run Genesis batch experiments with CSV export.")
+    parser.add_argument("--seed", type=int, default=0, help="first seed of the range")
+    parser.add_argument("--runs", type=int, default=1, help="number of consecutive seeds to run")
+    parser.add_argument("--max-ticks", type=int, default=config.MAX_TICK_COUNT)
+    parser.add_argument("--output-dir", default="results")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="worker processes, 1 runs everything in this process",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="also write per-phase step timings to seed_<n>_timings.csv",
+    )
+    parser.add_argument(
+        "--opcode-profile",
+        action="store_true",
+        help="also write per-tick opcode histograms and sampled opcode costs",
+    )
+    parser.add_argument(
+        "--strips",
+        type=int,
+        default=1,
+        help="split each world into this many strips stepped by their own processes",
+    )
+    parser.add_argument(
+        "--config",
+        default=None,
+        help="JSON or TOML file overriding the simulation settings in config.py",
+    )
+    parser.add_argument(
+        "--ensemble",
+        action="store_true",
+        help="step each worker's runs in lockstep as one ensemble (requires numpy)",
+    )
+    parser.add_argument(
+        "--resume",
+        default=None,
+        help="continue every run from this checkpoint, each with its own seed",
+    )
+    parser.add_argument(
+        "--checkpoint-at",
+        type=int,
+        default=None,
+        help="save each run to seed_<n>_tick_<tick>.ckpt once it reaches this tick",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    seeds = [args.seed + i for i in range(args.runs)]
+    workers = max(1, min(args.workers, len(seeds)))
+    checkpoints = args.resume is not None or args.checkpoint_at is not None
+    if checkpoints and (args.strips > 1 or args.ensemble):
+        sys.exit("--resume and --checkpoint-at cannot be combined with --strips or --ensemble")
+    # Neither strips nor ensembles record phase timings or opcode profiles.
+    if (args.timings or args.opcode_profile) and (args.strips > 1 or args.ensemble):
+        sys.exit("--timings and --opcode-profile cannot be combined with --strips or --ensemble")
+    if args.strips > 1:
+        if args.ensemble:
+            sys.exit("--ensemble and --strips cannot be combined")
+        # Every run already occupies `strips` processes.
+        workers = 1
+
+    settings = Settings.from_file(args.config) if args.config is not None else None
+
+    run_batch(
+        seeds,
+        args.max_ticks,
+        args.output_dir,
+        workers,
+        args.timings,
+        args.opcode_profile,
+        args.strips,
+        settings,
+        args.ensemble,
+        args.resume,
+        args.checkpoint_at,
+    )
 
 
 if __name__ == "__main__":
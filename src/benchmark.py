@@ -0,0 +1,258 @@
+import sys
+sys.dont_write_bytecode = True
+
+import argparse
+import json
+import platform
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+import config
+
+
+# Each scenario runs its seeds with the given config overrides.  Seeds are
+# pinned so two benchmark runs simulate exactly the same trajectories.
+SCENARIOS = {
+    "default": {
+        "ticks": 500,
+        "seeds": [1, 2, 3],
+        "config": {},
+    },
+    "large_world": {
+        "ticks": 300,
+        "seeds": [1, 2],
+        "config": {
+            "WORLD_WIDTH": 400,
+            "WORLD_HEIGHT": 400,
+            "INITIAL_POPULATION_A": 160,
+            "INITIAL_POPULATION_B": 80,
+        },
+    },
+    "huge_sparse_world": {
+        "ticks": 100,
+        "seeds": [1],
+        "config": {
+            "GRID_BACKEND": "chunked",
+            "WORLD_WIDTH": 10000,
+            "WORLD_HEIGHT": 10000,
+            "INITIAL_POPULATION_A": 400,
+            "INITIAL_POPULATION_B": 100,
+        },
+    },
+    "prey_bloom": {
+        "ticks": 300,
+        "seeds": [1, 2],
+        "config": {
+            "INITIAL_POPULATION_A": 600,
+            "INITIAL_POPULATION_B": 5,
+            "FOOD_REGEN_PROBABILITY": 0.02,
+        },
+    },
+    "predator_heavy": {
+        "ticks": 300,
+        "seeds": [1, 2],
+        "config": {
+            "INITIAL_POPULATION_A": 200,
+            "INITIAL_POPULATION_B": 150,
+        },
+    },
+    "long_soak": {
+        "ticks": 5000,
+        "seeds": [1],
+        "config": {
+            "INITIAL_POPULATION_A": 40,
+            "INITIAL_POPULATION_B": 10,
+        },
+    },
+}
+
+DEFAULT_THRESHOLD = 0.10
+
+
+def _peak_memory_kb() -> int | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    if sys.platform == "darwin":
+        peak //= 1024
+    return peak
+
+
+def run_scenario(name: str, tick_scale: float = 1.0, phases: bool = False) -> dict:
+    # Runs in a fresh worker process, so the config overrides and the peak
+    # memory figure belong to this scenario alone.
+    scenario = SCENARIOS[name]
+    for key, value in scenario["config"].items():
+        setattr(config, key, value)
+
+    from core.simulator import GenesisSimulator
+    from genetics.compiler import program_cache
+
+    max_ticks = max(1, int(scenario["ticks"] * tick_scale))
+    step_ns = 0
+    ticks = 0
+    organism_ticks = 0
+    phase_ns = {}
+    runs = []
+    # The backend after this scenario's overrides, not the parent's default.
+    grid_backend = config.GRID_BACKEND
+
+    for seed in scenario["seeds"]:
+        program_cache.clear()
+
+        sim = GenesisSimulator()
+        if phases:
+            sim.enable_phase_timing()
+        sim.reset(seed)
+
+        run_ns = 0
+        while sim.running and sim.tick < max_ticks:
+            organism_ticks += len(sim.population)
+            started = time.perf_counter_ns()
+            sim.step()
+            run_ns += time.perf_counter_ns() - started
+            if sim.is_extinct():
+                break
+
+        step_ns += run_ns
+        if sim.timer is not None:
+            for phase, mean in sim.timer.mean_ns().items():
+                phase_ns[phase] = phase_ns.get(phase, 0.0) + mean * len(sim.timer.history)
+        ticks += sim.tick
+        runs.append({
+            "seed": seed,
+            "ticks": sim.tick,
+            "population": len(sim.population),
+            "seconds": run_ns / 1e9,
+        })
+
+    seconds = step_ns / 1e9
+    result = {
+        "grid_backend": grid_backend,
+        "ticks": ticks,
+        "seconds": seconds,
+        "ticks_per_second": ticks / seconds if seconds > 0 else 0.0,
+        "organism_ticks": organism_ticks,
+        "ns_per_organism_tick": step_ns / organism_ticks if organism_ticks else 0.0,
+        "peak_memory_kb": _peak_memory_kb(),
+        "runs": runs,
+    }
+    if phases and ticks:
+        result["phase_ns_per_tick"] = {
+            phase: total / ticks for phase, total in phase_ns.items()
+        }
+    return result
+
+
+def run_benchmarks(names: list[str], tick_scale: float = 1.0, phases: bool = False) -> dict:
+    results = {}
+    for name in names:
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            result = executor.submit(run_scenario, name, tick_scale, phases).result()
+        results[name] = result
+        print(
+            f"{name:<16} Ticks/s = {result['ticks_per_second']:9.1f}  "
+            f"ns/organism = {result['ns_per_organism_tick']:9.0f}  "
+            f"Peak = {result['peak_memory_kb'] or 0} KB",
+            flush=True,
+        )
+
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+
+    return {
+        "python": platform.python_version(),
+        "numpy": numpy_version,
+        "tick_scale": tick_scale,
+        "scenarios": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    # A scenario regresses when it is more than `threshold` slower per tick or
+    # per organism, or uses more than `threshold` more peak memory.
+    regressions = []
+    for name, result in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+
+        checks = [
+            ("ticks_per_second", base["ticks_per_second"], result["ticks_per_second"], False),
+            ("ns_per_organism_tick", base["ns_per_organism_tick"], result["ns_per_organism_tick"], True),
+            ("peak_memory_kb", base.get("peak_memory_kb"), result.get("peak_memory_kb"), True),
+        ]
+        for metric, before, after, higher_is_worse in checks:
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            if (change > threshold) if higher_is_worse else (change < -threshold):
+                regressions.append(f"{name}: {metric} {before:.1f} -> {after:.1f} ({change:+.1%})")
+    return regressions
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the Genesis simulator without a window.")
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="scenario to run, may be repeated; runs all scenarios by default",
+    )
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    parser.add_argument("--compare", help="baseline JSON to check the results against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="relative change that counts as a regression",
+    )
+    parser.add_argument(
+        "--tick-scale",
+        type=float,
+        default=1.0,
+        help="multiplier on every scenario's tick count, for quick runs",
+    )
+    parser.add_argument(
+        "--phases",
+        action="store_true",
+        help="also record the mean time per tick of every step phase",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    names = args.scenario or list(SCENARIOS)
+
+    results = run_benchmarks(names, args.tick_scale, args.phases)
+
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION  {line}")
+        if regressions:
+            return 1
+        print("No regressions against baseline.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
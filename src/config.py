@@ -1,6 +1,9 @@
 WORLD_WIDTH = 100
 WORLD_HEIGHT = 100
 
+GRID_BACKEND = "list"  # "list", "numpy" or "chunked" (sparse tiles for very large worlds)
+CHUNK_SIZE = 64  # tile side of the chunked backend
+
 MAX_FOOD_UNITS = 10
 FOOD_REGEN_PROBABILITY = 0.005
 FOOD_DECAY_PROBABILITY = 0.005
@@ -50,15 +53,34 @@ SPECIES_PARAMETERS = {
 
 MUTATION_PROBABILITY = 0.0004
 
+PROGRAM_CACHE_SIZE = 4096
+
 POLLUTION_INCREMENT_PER_LIFE = 0.00002
 POLLUTION_RECOVERY_PER_TICK = 0.0002
 POLLUTION_CAP = 1.0
-global_pollution_level = 0.0
 
 TICK_DELAY_SECONDS = 0.1
+SEPARATE_SIMULATION_PROCESS = False  # step the simulation in a worker process, see main.py
+WORKER_TICK_DELAY_SECONDS = 0.0  # pause of that worker after every tick, 0 steps as fast as it can
+FRAME_RATE = 30  # target window redraws per second when not stepping at TICK_DELAY_SECONDS
+FAST_FORWARD_MAX_TICKS_PER_FRAME = 1000
+THEME_MODE = "auto"  # "auto" follows the desktop dark mode, "dark" or "light" fixes it
+THEME_POLL_INTERVAL = 1.0  # seconds between background dark mode checks, 0 checks once at startup
+FRAME_MAX_ORGANISMS = 100000  # organisms per shared frame, the rest are not drawn
 MAX_TICK_COUNT = 1000
 
+STATS_CAPTURE_STRIDE = 1
+STATS_FLUSH_INTERVAL = 256
+STATS_HISTORY_LIMIT = None  # None keeps every snapshot in memory
+PROFILE_PHASES = False  # record per-phase step timings in GenesisSimulator.timer
+PROFILE_OPCODES = False  # record opcode costs in GenesisSimulator.opcode_profiler
+OPCODE_PROFILE_SAMPLE_EVERY = 16  # time the handlers of every Nth program execution
+CHECKPOINT_COMPRESSION_LEVEL = 6  # zlib level for compressed checkpoints
+
 PREDATOR_SEARCH_RADIUS = 20
+PREY_FIELD_ENABLED = True  # used when numpy is installed
+TILED_STRIPS = 4  # worker processes of core.tiled.TiledSimulator, one horizontal strip each
+SPATIAL_BUCKET_SIZE = None  # None picks a size from world area and population
 PREDATOR_TRACE_DECAY = 0.9
 PREDATOR_TRACE_DEPOSIT = 1.5
 PREDATOR_TRACE_BONUS = 0.3
@@ -67,4 +89,5 @@ PREDATOR_REVISIT_PENALTY = 0.8
 PREDATOR_TUMBLE_PROB = 0.5
 PREDATOR_RANDOM_NOISE = 0.1
 PREDATOR_RUN_BONUS = 2
-PREDATOR_HEADING_BONUS = 0.25
\ No newline at end of file
+PREDATOR_HEADING_BONUS = 0.25
+PREDATOR_MAX_STEP = None  # cells a predator may move per instruction, None for no limit; tiled runs use 1 when unset
\ No newline at end of file
@@ -0,0 +1,285 @@
+import json
+import struct
+import sys
+import zlib
+from array import array
+from dataclasses import fields
+from pathlib import Path
+
+import config
+from core.rng import RngStreams
+from core.settings import Settings
+from core.simulator import GenesisSimulator
+from core.world import ChunkedFoodGrid, is_array_grid
+from genetics.prey_field import create_prey_field
+import genetics.vm as vm
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# A checkpoint file is MAGIC, a version and flags byte, then the payload,
+# zlib compressed when COMPRESSED is set.  The payload is the length of a
+# JSON header, the header, and the raw bytes of the arrays the header lists
+# in order, in the byte order the header names.
+MAGIC = b"GENESIS\x00"
+VERSION = 1
+COMPRESSED = 1
+
+_PREFIX = struct.Struct("<8sBB")
+_LENGTH = struct.Struct("<I")
+
+# Settings that fix the shape of the saved grids.
+_WORLD_SETTINGS = ("world_width", "world_height", "grid_backend", "chunk_size")
+
+
+def _settings_dict(settings: Settings) -> dict:
+    values = {f.name: getattr(settings, f.name) for f in fields(settings) if f.init}
+    values["species_parameters"] = {
+        str(species_id): parameters
+        for species_id, parameters in settings.species_parameters.items()
+    }
+    return values
+
+
+def _food_arrays(food_grid, arrays: dict) -> dict:
+    if isinstance(food_grid, ChunkedFoodGrid):
+        tiles = []
+        cells = array("B")
+        for key, tile in food_grid.tiles.items():
+            tx, ty = key
+            tiles.append([tx, ty, food_grid.applied[key], food_grid.rngs[key].bit_generator.state])
+            cells.frombytes(tile.tobytes())
+        arrays["food"] = cells
+        arrays["food.regen_p"] = food_grid.regen_p
+        arrays["food.decay_p"] = food_grid.decay_p
+        arrays["food.reseed_p"] = food_grid.reseed_p
+        products = array("d")
+        for product in food_grid.products.values():
+            products.frombytes(product.tobytes())
+        arrays["food.products"] = products
+        return {
+            "seed": food_grid.seed,
+            "tick": food_grid.tick,
+            "states": food_grid.states,
+            "waiting": [[start, food_grid.waiting[start]] for start in food_grid.products],
+            "pending": food_grid.pending,
+            "total": food_grid.total,
+            "tiles": tiles,
+        }
+
+    if is_array_grid(food_grid):
+        arrays["food"] = array("B", food_grid.tobytes())
+    else:
+        cells = array("B")
+        for row in food_grid:
+            cells.extend(row)
+        arrays["food"] = cells
+    return {}
+
+
+def _restore_food(meta: dict, arrays: dict, settings: Settings):
+    width = settings.world_width
+    height = settings.world_height
+    cells = arrays["food"]
+
+    if settings.grid_backend == "chunked":
+        food_grid = ChunkedFoodGrid(width, height, settings.chunk_size, meta["seed"], settings)
+        size = settings.chunk_size
+        data = cells.tobytes()
+        start = 0
+        for tx, ty, applied, state in meta["tiles"]:
+            shape = (min(size, height - ty * size), min(size, width - tx * size))
+            end = start + shape[0] * shape[1]
+            rng = np.random.Generator(getattr(np.random, state["bit_generator"])())
+            rng.bit_generator.state = state
+            key = (tx, ty)
+            food_grid.tiles[key] = np.frombuffer(data[start:end], dtype="uint8").reshape(shape).copy()
+            food_grid.rngs[key] = rng
+            food_grid.applied[key] = applied
+            start = end
+        food_grid.regen_p.extend(arrays["food.regen_p"])
+        food_grid.decay_p.extend(arrays["food.decay_p"])
+        food_grid.reseed_p.extend(arrays["food.reseed_p"])
+
+        # Settings with fewer food states than the saved ones keep the saved
+        # number, since tiles can still hold the larger amounts; with more
+        # states the saved transitions leave the new ones where they are.
+        saved = meta["states"]
+        states = max(saved, food_grid.states)
+        products = np.frombuffer(arrays["food.products"].tobytes(), dtype="float64").reshape(-1, saved, saved)
+        if states > saved:
+            padded = np.tile(np.eye(states), (len(products), 1, 1))
+            padded[:, :saved, :saved] = products
+            products = padded
+        food_grid.states = states
+        food_grid.tick = meta["tick"]
+        food_grid.waiting = {start: count for start, count in meta["waiting"]}
+        food_grid.products = {start: product.copy() for (start, _), product in zip(meta["waiting"], products)}
+        food_grid.pending = meta["pending"]
+        food_grid.total = meta["total"]
+        return food_grid
+
+    if settings.grid_backend == "numpy":
+        return np.frombuffer(cells.tobytes(), dtype="uint8").reshape(height, width).copy()
+
+    values = cells.tolist()
+    return [values[y * width:(y + 1) * width] for y in range(height)]
+
+
+def save_checkpoint(simulator: GenesisSimulator, path, compress: bool = True) -> None:
+    # Writes everything a GenesisSimulator needs to carry on from the
+    # current tick exactly as it would have without stopping.  Random state
+    # is just the seed: every stream is keyed by seed and tick, so only the
+    # generators of chunked grid tiles have state of their own.
+    #
+    # Phase timings, opcode profiles and any open stats sink are not saved.
+    settings = simulator.settings
+    arrays = {}
+
+    for name, values in simulator.population.export_arrays().items():
+        arrays[f"population.{name}"] = values
+
+    cells = simulator.trace_field.cells
+    arrays["trace.x"] = array("i", [x for x, _ in cells])
+    arrays["trace.y"] = array("i", [y for _, y in cells])
+    arrays["trace.value"] = array("d", [value for value, _ in cells.values()])
+    arrays["trace.stamp"] = array("q", [stamp for _, stamp in cells.values()])
+
+    for name, values in simulator.stats.history.export_columns().items():
+        arrays[f"history.{name}"] = values
+
+    food = _food_arrays(simulator.food_grid, arrays)
+
+    header = {
+        "version": VERSION,
+        "byteorder": sys.byteorder,
+        "settings": _settings_dict(settings),
+        "seed": simulator.seed,
+        "tick": simulator.tick,
+        "running": simulator.running,
+        "pollution": simulator.pollution,
+        "food_total": simulator.food_total,
+        "food": food,
+        "trace_tick": simulator.trace_field.tick,
+        "bucket_size": simulator.spatial.bucket_size,
+        "totals": [
+            [species_id, *values]
+            for species_id, values in simulator.population.totals.items()
+        ],
+        "arrays": [[name, values.typecode, len(values)] for name, values in arrays.items()],
+    }
+    encoded = json.dumps(header, separators=(",", ":")).encode("utf-8")
+
+    parts = [_LENGTH.pack(len(encoded)), encoded]
+    parts.extend(values.tobytes() for values in arrays.values())
+    payload = b"".join(parts)
+    if compress:
+        payload = zlib.compress(payload, config.CHECKPOINT_COMPRESSION_LEVEL)
+
+    output_path = Path(path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with output_path.open("wb") as f:
+        f.write(_PREFIX.pack(MAGIC, VERSION, COMPRESSED if compress else 0))
+        f.write(payload)
+
+
+def read_checkpoint(path) -> tuple[dict, dict]:
+    # The header and arrays of a checkpoint file.
+    data = Path(path).read_bytes()
+    magic, version, flags = _PREFIX.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a Genesis checkpoint")
+    if version != VERSION:
+        raise ValueError(f"Unsupported checkpoint version {version} in {path}")
+
+    payload = data[_PREFIX.size:]
+    if flags & COMPRESSED:
+        payload = zlib.decompress(payload)
+
+    (length,) = _LENGTH.unpack_from(payload)
+    offset = _LENGTH.size
+    header = json.loads(payload[offset:offset + length])
+    offset += length
+
+    swap = header["byteorder"] != sys.byteorder
+    arrays = {}
+    for name, typecode, count in header["arrays"]:
+        values = array(typecode)
+        end = offset + count * values.itemsize
+        values.frombytes(payload[offset:end])
+        if swap:
+            values.byteswap()
+        arrays[name] = values
+        offset = end
+    return header, arrays
+
+
+def restore_checkpoint(
+    header: dict,
+    arrays: dict,
+    settings: Settings | None = None,
+    seed: int | None = None,
+) -> GenesisSimulator:
+    # A new simulator from read_checkpoint.  settings may change anything
+    # but the world size and grid backend, and a seed other than the saved
+    # one makes every draw from the checkpoint tick on come from that seed,
+    # which is how variant runs fork from one checkpoint.  Tiles of a chunked
+    # grid keep their own generators either way.
+    saved = Settings.from_dict(header["settings"])
+    if settings is None:
+        settings = saved
+    else:
+        for name in _WORLD_SETTINGS:
+            if getattr(settings, name) != getattr(saved, name):
+                raise ValueError(f"{name} differs from the checkpoint's ({getattr(saved, name)!r})")
+
+    if settings.grid_backend != "list" and np is None:
+        raise RuntimeError(f"grid_backend = {settings.grid_backend!r} requires numpy to be installed")
+
+    sim = GenesisSimulator(settings)
+    sim.seed = header["seed"] if seed is None else seed
+    sim.streams = RngStreams(sim.seed)
+    sim.tick = header["tick"]
+    sim.running = header["running"]
+    sim.pollution = header["pollution"]
+    sim.food_total = header["food_total"]
+    sim.food_grid = _restore_food(header["food"], arrays, settings)
+
+    trace_field = sim.trace_field
+    trace_field.tick = header["trace_tick"]
+    trace_field.cells = dict(zip(
+        zip(arrays["trace.x"], arrays["trace.y"]),
+        zip(arrays["trace.value"], arrays["trace.stamp"]),
+    ))
+
+    prefix = "population."
+    sim.population.import_arrays(
+        {name[len(prefix):]: values for name, values in arrays.items() if name.startswith(prefix)},
+        {species_id: values for species_id, *values in header["totals"]},
+    )
+    sim.spatial = vm.SpatialIndex(sim.population, settings)
+    sim.spatial.rebuild(settings.spatial_bucket_size or header["bucket_size"])
+    sim.spatial.prey_field = create_prey_field(settings)
+    if sim.spatial.prey_field is not None:
+        sim.spatial.prey_field.rebuild(
+            o for o in sim.population if o.species_id == config.SPECIES_A
+        )
+
+    history = sim.stats.history
+    history.import_columns({name: arrays[f"history.{name}"] for name in history.names})
+    return sim
+
+
+def load_checkpoint(path, settings: Settings | None = None, seed: int | None = None) -> GenesisSimulator:
+    header, arrays = read_checkpoint(path)
+    return restore_checkpoint(header, arrays, settings, seed)
+
+
+def fork_checkpoint(path, seeds: list[int], settings: Settings | None = None) -> list[GenesisSimulator]:
+    # One independent simulator per seed, all continuing from the same
+    # checkpoint, which is only read once.
+    header, arrays = read_checkpoint(path)
+    return [restore_checkpoint(header, arrays, settings, seed) for seed in seeds]
\ No newline at end of file
@@ -0,0 +1,122 @@
+import numpy as np
+
+from core.rng import FOOD, WORLD
+from core.settings import Settings
+from core.simulator import GenesisSimulator
+from core.stats import StatsSnapshot
+from core.world import regenerate_food_stack
+from genetics.prey_field import distance_field
+
+
+class EnsembleSimulator:
+    # Replicates of one world, one per seed, stepped in lockstep.  The food
+    # grids and prey fields of all worlds are rows of stacked (worlds,
+    # height, width) arrays, so food regeneration and the prey field refresh
+    # each run as one vectorized pass, pollution advances for every world in
+    # one array operation, and each tick produces one batch of
+    # StatsSnapshots.  Organisms still run through the VM world by world.
+    #
+    # Worlds always use the numpy grid backend, and every world follows
+    # exactly the trajectory of a GenesisSimulator with that backend and the
+    # same seed.  A world that dies out stops while the others go on.
+    def __init__(self, seeds: list[int], settings: Settings | None = None) -> None:
+        if settings is None:
+            settings = Settings.from_config()
+        if settings.grid_backend == "chunked":
+            raise ValueError("the chunked grid backend cannot be stacked into an ensemble")
+        if settings.grid_backend != "numpy":
+            settings = settings.replace(grid_backend="numpy")
+
+        self.settings = settings
+        self.seeds = list(seeds)
+        self.worlds = [GenesisSimulator(settings) for _ in self.seeds]
+        self.food = None
+        self.prey_counts = None
+        self.prey_dirty = None
+        self.pollution = np.zeros(len(self.seeds))
+        self.tick = 0
+        self.running = False
+        # The snapshots of the latest tick, one per world in seed order, None
+        # for worlds that have stopped or did not capture on that tick.
+        self.batch = []
+
+    def __len__(self) -> int:
+        return len(self.worlds)
+
+    def reset(self) -> None:
+        for world, seed in zip(self.worlds, self.seeds):
+            world.reset(seed)
+
+        # The worlds keep working on their own grids, which from here on
+        # are views into the stack.
+        self.food = np.stack([world.food_grid for world in self.worlds])
+        for row, world in enumerate(self.worlds):
+            world.food_grid = self.food[row]
+
+        self.prey_counts = None
+        self.prey_dirty = None
+        fields = [world.spatial.prey_field for world in self.worlds]
+        if fields and fields[0] is not None:
+            self.prey_counts = np.stack([field.counts for field in fields])
+            self.prey_dirty = np.stack([field.dirty for field in fields])
+            for row, field in enumerate(fields):
+                field.counts = self.prey_counts[row]
+                field.dirty = self.prey_dirty[row]
+
+        self.pollution[...] = 0.0
+        self.tick = 0
+        self.running = bool(self.worlds)
+        self.batch = [None] * len(self.worlds)
+
+    def step(self) -> list[StatsSnapshot | None]:
+        if not self.running:
+            return self.batch
+
+        worlds = self.worlds
+        settings = self.settings
+        rows = [row for row, world in enumerate(worlds) if world.running]
+
+        living = np.array([len(worlds[row].population) for row in rows], dtype="float64")
+        levels = (
+            self.pollution[rows]
+            + settings.pollution_increment_per_life * living
+            - settings.pollution_recovery_per_tick
+        )
+        levels = np.maximum(0.0, np.minimum(levels, settings.pollution_cap))
+        self.pollution[rows] = levels
+        levels = levels.tolist()
+
+        self.tick += 1
+        for row, level in zip(rows, levels):
+            worlds[row].start_step(level)
+
+        if self.prey_counts is not None:
+            field = worlds[0].spatial.prey_field
+            distances = distance_field(self.prey_counts[rows] > 0, field.radius, field.none)
+            for index, row in enumerate(rows):
+                worlds[row].spatial.prey_field.distance_grid = distances[index]
+            self.prey_dirty[rows] = False
+
+        for row in rows:
+            worlds[row].act()
+
+        generators = [
+            worlds[row].streams.numpy_generator(worlds[row].tick, WORLD, FOOD)
+            for row in rows
+        ]
+        changes = regenerate_food_stack(self.food, settings, rows, levels, generators)
+
+        batch = [None] * len(worlds)
+        for row, change in zip(rows, changes):
+            world = worlds[row]
+            world.food_total += change
+            if world.timer is not None:
+                world.timer.mark("food")
+            batch[row] = world.finish_step()
+
+        self.batch = batch
+        self.running = any(world.running for world in worlds)
+        return batch
+
+    def is_extinct(self) -> bool:
+        return not self.running
\ No newline at end of file
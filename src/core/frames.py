@@ -0,0 +1,216 @@
+import math
+import time
+from dataclasses import fields
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import config
+from core.stats import StatsCollector, StatsSnapshot
+from core.world import dense_food_grid
+
+
+SNAPSHOT_FIELDS = fields(StatsSnapshot)
+
+# Header words: index of the newest complete slot (-1 before the first
+# frame), the finish state, then one sequence number per slot.
+LATEST = 0
+FINISHED = 1
+SEQUENCES = 2
+HEADER_BYTES = 4 * 8
+
+RUNNING = 0
+FINISHED_EXTINCT = 1
+FINISHED_MAX_TICKS = 2
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // 8) * 8
+
+
+def _slot_layout(width: int, height: int, max_organisms: int) -> list:
+    # (name, dtype, length) of every array in one slot; "counts" holds the
+    # tick and the number of organisms in the frame.
+    return [
+        ("counts", np.int64, 2),
+        ("snapshot", np.float64, len(SNAPSHOT_FIELDS)),
+        ("food", np.int16, width * height),
+        ("x", np.int32, max_organisms),
+        ("y", np.int32, max_organisms),
+        ("species", np.int8, max_organisms),
+    ]
+
+
+def _slot_size(width: int, height: int, max_organisms: int) -> int:
+    size = 0
+    for _, dtype, length in _slot_layout(width, height, max_organisms):
+        size = _aligned(size + length * np.dtype(dtype).itemsize)
+    return size
+
+
+def _encode_snapshot(snapshot, values) -> None:
+    for i, field in enumerate(SNAPSHOT_FIELDS):
+        value = getattr(snapshot, field.name)
+        values[i] = math.nan if value is None else value
+
+
+def _decode_snapshot(values) -> StatsSnapshot:
+    decoded = {}
+    for field, value in zip(SNAPSHOT_FIELDS, values.tolist()):
+        if math.isnan(value):
+            decoded[field.name] = None
+        elif field.type is float:
+            decoded[field.name] = value
+        else:
+            decoded[field.name] = int(value)
+    return StatsSnapshot(**decoded)
+
+
+class Frame:
+    # One published frame, copied out of shared memory.  positions() and
+    # food_grid let GenesisWindow.render draw it like a live population.
+    def __init__(self, tick: int, food_grid, xs, ys, species, snapshot) -> None:
+        self.tick = tick
+        self.food_grid = food_grid
+        self.xs = xs
+        self.ys = ys
+        self.species = species
+        self.snapshot = snapshot
+
+    def positions(self):
+        return self.xs, self.ys, self.species
+
+
+class SharedFrameBuffer:
+    # Two frame slots in one shared memory block.  The writer always fills
+    # the slot that is not the newest, bracketing the write with sequence
+    # number increments (odd while writing), and then publishes it as the
+    # newest.  A reader copies the newest slot and retries if its sequence
+    # number moved meanwhile, so neither side ever waits on the other.
+    def __init__(self, memory, width: int, height: int, max_organisms: int, owner: bool) -> None:
+        self.memory = memory
+        self.name = memory.name
+        self.width = width
+        self.height = height
+        self.max_organisms = max_organisms
+        self.owner = owner
+
+        self.header = np.ndarray((4,), dtype=np.int64, buffer=memory.buf)
+        self.slots = []
+        offset = HEADER_BYTES
+        for _ in range(2):
+            slot = {}
+            for name, dtype, length in _slot_layout(width, height, max_organisms):
+                slot[name] = np.ndarray((length,), dtype=dtype, buffer=memory.buf, offset=offset)
+                offset = _aligned(offset + length * np.dtype(dtype).itemsize)
+            slot["food"] = slot["food"].reshape(height, width)
+            self.slots.append(slot)
+
+    @classmethod
+    def create(cls, width: int, height: int, max_organisms: int):
+        size = HEADER_BYTES + 2 * _slot_size(width, height, max_organisms)
+        memory = shared_memory.SharedMemory(create=True, size=size)
+        buffer = cls(memory, width, height, max_organisms, owner=True)
+        buffer.header[:] = (-1, RUNNING, 0, 0)
+        return buffer
+
+    @classmethod
+    def attach(cls, name: str, width: int, height: int, max_organisms: int):
+        memory = shared_memory.SharedMemory(name=name)
+        return cls(memory, width, height, max_organisms, owner=False)
+
+    @property
+    def finished(self) -> int:
+        return int(self.header[FINISHED])
+
+    def finish(self, state: int) -> None:
+        self.header[FINISHED] = state
+
+    def publish(self, simulator) -> None:
+        header = self.header
+        index = 1 - int(header[LATEST]) if header[LATEST] >= 0 else 0
+        slot = self.slots[index]
+
+        header[SEQUENCES + index] += 1
+
+        xs, ys, species = simulator.population.positions()
+        count = min(len(xs), self.max_organisms)
+        slot["x"][:count] = xs[:count]
+        slot["y"][:count] = ys[:count]
+        slot["species"][:count] = species[:count]
+        slot["food"][...] = dense_food_grid(simulator.food_grid)
+        slot["counts"][:] = (simulator.tick, count)
+        if simulator.stats.history:
+            _encode_snapshot(simulator.stats.history[-1], slot["snapshot"])
+        else:
+            slot["snapshot"][:] = math.nan
+
+        header[SEQUENCES + index] += 1
+        header[LATEST] = index
+
+    def read(self) -> Frame | None:
+        # The newest complete frame, or None before the first one.
+        header = self.header
+        while True:
+            index = int(header[LATEST])
+            if index < 0:
+                return None
+
+            sequence = int(header[SEQUENCES + index])
+            if sequence % 2:
+                continue
+
+            slot = self.slots[index]
+            tick, count = slot["counts"].tolist()
+            food = slot["food"].copy()
+            xs = slot["x"][:count].copy()
+            ys = slot["y"][:count].copy()
+            species = slot["species"][:count].copy()
+            snapshot = slot["snapshot"].copy()
+
+            if int(header[SEQUENCES + index]) != sequence:
+                continue
+
+            decoded = None if math.isnan(snapshot[0]) else _decode_snapshot(snapshot)
+            return Frame(tick, food, xs, ys, species, decoded)
+
+    def close(self) -> None:
+        # The arrays view the shared block and have to go before it closes.
+        self.header = None
+        self.slots = []
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+def run_simulation_worker(name: str, settings, max_organisms: int, stop_event) -> None:
+    # Entry point of the simulation process started by main.py.  Steps the
+    # simulator as fast as it can, or WORKER_TICK_DELAY_SECONDS apart, and
+    # publishes a frame after every tick; the reader draws at FRAME_RATE.
+    from core.simulator import GenesisSimulator
+
+    buffer = SharedFrameBuffer.attach(name, settings.world_width, settings.world_height, max_organisms)
+    try:
+        sim = GenesisSimulator(settings)
+        # Only the newest snapshot is published, so there is no reason to
+        # keep the rest.
+        sim.stats = StatsCollector(history_limit=1)
+        sim.reset()
+        buffer.publish(sim)
+
+        while not stop_event.is_set():
+            if not sim.running or sim.tick >= config.MAX_TICK_COUNT:
+                buffer.finish(FINISHED_MAX_TICKS)
+                break
+
+            sim.step()
+            buffer.publish(sim)
+
+            if sim.is_extinct():
+                buffer.finish(FINISHED_EXTINCT)
+                break
+
+            if config.WORKER_TICK_DELAY_SECONDS > 0:
+                time.sleep(config.WORKER_TICK_DELAY_SECONDS)
+    finally:
+        buffer.close()
\ No newline at end of file
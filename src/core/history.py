@@ -0,0 +1,193 @@
+import csv
+from array import array
+from dataclasses import fields
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+MISSING = -1
+
+_TYPECODES = {int: "q", float: "d"}
+_NUMPY_DTYPES = {"q": "int64", "d": "float64", "i": "int32"}
+
+
+def _typecode(field_type) -> str:
+    # Optional ints (the dominant opcodes) are stored as "i" with MISSING
+    # standing in for None.
+    return _TYPECODES.get(field_type, "i")
+
+
+class ColumnarHistory:
+    # One typed array per record field.  Columns are preallocated and
+    # replaced by larger copies when full, so views handed out by column() and
+    # as_numpy() never block growth; they simply stop seeing new rows.
+    #
+    # With a limit the history behaves as a ring buffer of the most recent
+    # rows: rows older than the limit are dropped in bulk whenever the
+    # preallocated columns fill up.
+    def __init__(self, record_type, limit: int | None = None, capacity: int = 1024) -> None:
+        self.record_type = record_type
+        self.names = [field.name for field in fields(record_type)]
+        self.typecodes = {field.name: _typecode(field.type) for field in fields(record_type)}
+        self.optional = {
+            name for name, typecode in self.typecodes.items() if typecode == "i"
+        }
+        self.limit = limit
+        self.initial_capacity = max(1, capacity)
+        self.clear()
+
+    def clear(self) -> None:
+        self.capacity = self.initial_capacity
+        self.size = 0
+        self.columns = {
+            name: array(typecode, [0]) * self.capacity
+            for name, typecode in self.typecodes.items()
+        }
+
+    @property
+    def start(self) -> int:
+        if self.limit is None:
+            return 0
+        return max(0, self.size - self.limit)
+
+    def __len__(self) -> int:
+        return self.size - self.start
+
+    def _resize(self, keep_from: int, capacity: int) -> None:
+        kept = self.size - keep_from
+        for name, typecode in self.typecodes.items():
+            column = self.columns[name]
+            self.columns[name] = column[keep_from:self.size] + array(typecode, [0]) * (capacity - kept)
+        self.capacity = capacity
+        self.size = kept
+
+    def append(self, record) -> None:
+        if self.limit == 0:
+            return
+
+        if self.size == self.capacity:
+            if self.limit is not None and self.size >= 2 * self.limit:
+                self._resize(self.size - self.limit, self.capacity)
+            else:
+                self._resize(0, self.capacity * 2)
+
+        size = self.size
+        optional = self.optional
+        for name in self.names:
+            value = getattr(record, name)
+            if value is None and name in optional:
+                value = MISSING
+            self.columns[name][size] = value
+        self.size = size + 1
+
+    def _row(self, index: int) -> dict:
+        row = {}
+        for name in self.names:
+            value = self.columns[name][index]
+            if value == MISSING and name in self.optional:
+                value = None
+            row[name] = value
+        return row
+
+    def __getitem__(self, index: int):
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("history index out of range")
+        return self.record_type(**self._row(self.start + index))
+
+    def __iter__(self):
+        for index in range(self.start, self.size):
+            yield self.record_type(**self._row(index))
+
+    def export_columns(self) -> dict[str, array]:
+        # Copies of the kept rows of every column.
+        return {name: self.columns[name][self.start:self.size] for name in self.names}
+
+    def import_columns(self, columns: dict[str, array]) -> None:
+        # Replaces the history with rows from export_columns.
+        size = len(columns[self.names[0]]) if self.names else 0
+        self.capacity = max(self.initial_capacity, size)
+        self.size = size
+        self.columns = {
+            name: columns[name] + array(typecode, [0]) * (self.capacity - size)
+            for name, typecode in self.typecodes.items()
+        }
+
+    def column(self, name: str) -> memoryview:
+        return memoryview(self.columns[name])[self.start:self.size]
+
+    def as_numpy(self, name: str):
+        column = self.columns[name]
+        values = np.frombuffer(column, dtype=_NUMPY_DTYPES[column.typecode], count=self.size)
+        return values[self.start:]
+
+    def _values(self, name: str):
+        if np is not None:
+            return self.as_numpy(name)
+        return self.columns[name][self.start:self.size]
+
+    def min_max(self, name: str) -> tuple[float, float] | None:
+        if not len(self):
+            return None
+        values = self._values(name)
+        if np is not None:
+            return values.min().item(), values.max().item()
+        return min(values), max(values)
+
+    def rolling_mean(self, name: str, window: int) -> list[float]:
+        # Mean over each trailing window of rows, one value per row once a
+        # full window is available.
+        window = max(1, window)
+        values = self._values(name)
+        if len(values) < window:
+            return []
+
+        if np is not None:
+            sums = np.cumsum(values, dtype="float64")
+            sums[window:] = sums[window:] - sums[:-window]
+            return (sums[window - 1:] / window).tolist()
+
+        means = []
+        total = sum(values[:window])
+        means.append(total / window)
+        for i in range(window, len(values)):
+            total += values[i] - values[i - window]
+            means.append(total / window)
+        return means
+
+    def time_to_extinction(self, name: str = "population_total") -> int | None:
+        # The tick of the first row where the given population column reaches
+        # zero, or None if it never does.
+        values = self._values(name)
+        if np is not None:
+            hits = np.flatnonzero(values == 0)
+            if not hits.size:
+                return None
+            index = int(hits[0])
+        else:
+            index = next((i for i, value in enumerate(values) if value == 0), None)
+            if index is None:
+                return None
+        return int(self.columns["tick"][self.start + index])
+
+    def write_csv(self, path) -> None:
+        output_path = Path(path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        columns = []
+        for name in self.names:
+            values = self.columns[name][self.start:self.size].tolist()
+            if name in self.optional:
+                values = ["" if value == MISSING else value for value in values]
+            columns.append(values)
+
+        with output_path.open("w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.names)
+            writer.writerows(zip(*columns))
\ No newline at end of file
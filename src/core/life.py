@@ -1,38 +1,150 @@
-from genetics.genome import init_random_genome
+DEATH_CAUSES = (None, "intrinsic", "starvation", "predation", "pollution")
+DEATH_CAUSE_CODES = {cause: code for code, cause in enumerate(DEATH_CAUSES)}
+
+REGISTER_COUNT = 4
+MEMORY_SIZE = 16
+
+# Per-species running totals kept by Population, as [count, age, energy,
+# metabolism] lists indexed with these constants.
+COUNT = 0
+AGE_SUM = 1
+ENERGY_SUM = 2
+METABOLISM_SUM = 3
+
+
+class Row:
+    __slots__ = ("data", "base", "size")
+
+    def __init__(self, data, base: int, size: int) -> None:
+        self.data = data
+        self.base = base
+        self.size = size
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, index: int) -> float:
+        if not -self.size <= index < self.size:
+            raise IndexError("row index out of range")
+        return self.data[self.base + index % self.size]
+
+    def __setitem__(self, index: int, value: float) -> None:
+        if not -self.size <= index < self.size:
+            raise IndexError("row index out of range")
+        self.data[self.base + index % self.size] = value
+
+    def __iter__(self):
+        return iter(self.data[self.base:self.base + self.size])
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+COLUMN_ATTRIBUTES = (
+    ("organism_id", "organism_id"),
+    ("x", "x"),
+    ("y", "y"),
+    ("energy", "energy"),
+    ("age_ticks", "age"),
+    ("lifespan_ticks", "lifespan"),
+    ("metabolism_rate", "metabolism"),
+    ("mobility_probability", "mobility"),
+    ("generation_index", "generation"),
+    ("species_id", "species"),
+    ("genome", "genomes"),
+    ("ip", "ip"),
+    ("heading_dx", "heading_dx"),
+    ("heading_dy", "heading_dy"),
+    ("last_search_score", "last_search_score"),
+    ("current_search_score", "current_search_score"),
+    ("run_ticks_left", "run_ticks_left"),
+    ("last_x", "last_x"),
+    ("last_y", "last_y"),
+)
+
+
+def _column_property(column) -> property:
+    def fget(self):
+        return column[self.slot]
+
+    def fset(self, value):
+        column[self.slot] = value
+
+    return property(fget, fset)
+
+
+def _row_property(data, size: int) -> property:
+    def fget(self):
+        return Row(data, self.slot * size, size)
+
+    def fset(self, values):
+        base = self.slot * size
+        for i, value in enumerate(values):
+            data[base + i] = value
+
+    return property(fget, fset)
+
 
 class Life:
-    def __init__(
-        self,
-        x: int,
-        y: int,
-        energy: float,
-        lifespan: int,
-        metabolism: float,
-        mobility: float,
-        generation: int,
-        species_id: int,
-        genome: list[int] | None = None,
-    ) -> None:
-        self.x = x
-        self.y = y
-        self.energy = float(energy)
-        self.age_ticks = 0
-        self.lifespan_ticks = lifespan
-        self.metabolism_rate = metabolism
-        self.mobility_probability = mobility
-        self.generation_index = generation
-        self.species_id = species_id
-        self.genome: list[int] = genome if genome is not None else init_random_genome()
-        self.ip: int = 0
-        self.registers: list[float] = [0.0, 0.0, 0.0, 0.0]
-        self.memory: list[float] = [0.0] * 16
-        self.heading_dx: int = 0
-        self.heading_dy: int = 0
-        self.last_search_score: float = 0.0
-        self.current_search_score: float = 0.0
-        self.run_ticks_left: int = 0
-        self.last_x: int = x
-        self.last_y: int = y
+    # A view of one population slot.  Field access goes through the
+    # properties that make_life_class binds to a population's columns.
+    __slots__ = ("population", "slot")
+
+    def __init__(self, population, slot: int) -> None:
+        self.population = population
+        self.slot = slot
+
+    @property
+    def death_cause(self) -> str | None:
+        return DEATH_CAUSES[self.population.death_cause[self.slot]]
+
+    @death_cause.setter
+    def death_cause(self, cause: str | None) -> None:
+        self.population.death_cause[self.slot] = DEATH_CAUSE_CODES[cause]
+
+    @property
+    def was_mutated(self) -> bool:
+        return bool(self.population.mutated[self.slot])
+
+    @was_mutated.setter
+    def was_mutated(self, mutated: bool) -> None:
+        self.population.mutated[self.slot] = 1 if mutated else 0
 
     def is_dead(self) -> bool:
-        return self.energy <= 0.0 or self.age_ticks > self.lifespan_ticks
\ No newline at end of file
+        population = self.population
+        slot = self.slot
+        return (
+            population.energy[slot] <= 0.0
+            or population.age[slot] > population.lifespan[slot]
+        )
+
+    def __repr__(self) -> str:
+        return f"Life(slot={self.slot}, species={self.species_id}, x={self.x}, y={self.y})"
+
+
+def make_life_class(population) -> type:
+    namespace = {"__slots__": ()}
+    for attribute, name in COLUMN_ATTRIBUTES:
+        namespace[attribute] = _column_property(getattr(population, name))
+    namespace["registers"] = _row_property(population.registers, REGISTER_COUNT)
+    namespace["memory"] = _row_property(population.memory, MEMORY_SIZE)
+
+    energy = population.energy
+    age = population.age
+    lifespan = population.lifespan
+    species = population.species
+    totals = population.totals
+
+    def set_energy(self, value) -> None:
+        slot = self.slot
+        totals[species[slot]][ENERGY_SUM] += value - energy[slot]
+        energy[slot] = value
+
+    namespace["energy"] = property(namespace["energy"].fget, set_energy)
+
+    def is_dead(self) -> bool:
+        slot = self.slot
+        return energy[slot] <= 0.0 or age[slot] > lifespan[slot]
+
+    namespace["is_dead"] = is_dead
+    return type("Life", (Life,), namespace)
\ No newline at end of file
@@ -0,0 +1,396 @@
+from array import array
+
+from core.life import (
+    AGE_SUM,
+    COUNT,
+    DEATH_CAUSE_CODES,
+    DEATH_CAUSES,
+    ENERGY_SUM,
+    MEMORY_SIZE,
+    METABOLISM_SUM,
+    REGISTER_COUNT,
+    Life,
+    make_life_class,
+)
+from core.rng import POLLUTION as POLLUTION_STREAM
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+INTRINSIC = DEATH_CAUSE_CODES["intrinsic"]
+STARVATION = DEATH_CAUSE_CODES["starvation"]
+POLLUTION = DEATH_CAUSE_CODES["pollution"]
+
+COLUMNS = (
+    ("organism_id", "q"),
+    ("x", "i"),
+    ("y", "i"),
+    ("energy", "d"),
+    ("age", "i"),
+    ("lifespan", "i"),
+    ("metabolism", "d"),
+    ("mobility", "d"),
+    ("generation", "i"),
+    ("species", "b"),
+    ("ip", "i"),
+    ("heading_dx", "i"),
+    ("heading_dy", "i"),
+    ("last_search_score", "d"),
+    ("current_search_score", "d"),
+    ("run_ticks_left", "i"),
+    ("last_x", "i"),
+    ("last_y", "i"),
+    ("death_cause", "b"),
+    ("mutated", "b"),
+    ("in_use", "b"),
+)
+
+# Every column that describes an organism, as opposed to slot bookkeeping.
+STATE_COLUMNS = tuple(name for name, _ in COLUMNS if name != "in_use")
+
+_NUMPY_DTYPES = {"q": "int64", "i": "intc", "d": "float64", "b": "int8"}
+
+
+class Population:
+    def __init__(self) -> None:
+        for name, typecode in COLUMNS:
+            setattr(self, name, array(typecode))
+        self.registers = array("d")
+        self.memory = array("d")
+        self.genomes: list[list[int]] = []
+        self.programs: list = []
+        self.views: list[Life] = []
+        self.free_slots: list[int] = []
+        self.count = 0
+        self.totals: dict[int, list] = {}
+        self.life_class = make_life_class(self)
+
+    def clear(self) -> None:
+        # Columns are emptied in place because the view class is bound to
+        # these exact array objects.
+        for name, _ in COLUMNS:
+            del getattr(self, name)[:]
+        del self.registers[:]
+        del self.memory[:]
+        self.genomes.clear()
+        self.programs.clear()
+        self.views.clear()
+        self.free_slots.clear()
+        self.count = 0
+        self.totals.clear()
+
+    def species_totals(self, species_id: int) -> tuple[int, int, float, float]:
+        # (count, age sum, energy sum, metabolism sum) over the organisms of
+        # one species, kept up to date by every change to those fields.
+        totals = self.totals.get(species_id)
+        if totals is None:
+            return 0, 0, 0.0, 0.0
+        return tuple(totals)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self):
+        in_use = self.in_use
+        views = self.views
+        return iter([views[slot] for slot in range(len(in_use)) if in_use[slot]])
+
+    @property
+    def capacity(self) -> int:
+        return len(self.in_use)
+
+    def _grow(self) -> int:
+        slot = len(self.in_use)
+        for name, _ in COLUMNS:
+            getattr(self, name).append(0)
+        self.registers.extend([0.0] * REGISTER_COUNT)
+        self.memory.extend([0.0] * MEMORY_SIZE)
+        self.genomes.append([])
+        self.programs.append(None)
+        self.views.append(self.life_class(self, slot))
+        return slot
+
+    def spawn(
+        self,
+        x: int,
+        y: int,
+        energy: float,
+        lifespan: int,
+        metabolism: float,
+        mobility: float,
+        generation: int,
+        species_id: int,
+        genome: list[int],
+        organism_id: int = 0,
+    ) -> Life:
+        slot = self.free_slots.pop() if self.free_slots else self._grow()
+
+        self.organism_id[slot] = organism_id
+        self.x[slot] = x
+        self.y[slot] = y
+        self.energy[slot] = energy
+        self.age[slot] = 0
+        self.lifespan[slot] = lifespan
+        self.metabolism[slot] = metabolism
+        self.mobility[slot] = mobility
+        self.generation[slot] = generation
+        self.species[slot] = species_id
+        self.ip[slot] = 0
+        self.heading_dx[slot] = 0
+        self.heading_dy[slot] = 0
+        self.last_search_score[slot] = 0.0
+        self.current_search_score[slot] = 0.0
+        self.run_ticks_left[slot] = 0
+        self.last_x[slot] = x
+        self.last_y[slot] = y
+        self.death_cause[slot] = 0
+        self.mutated[slot] = 0
+        self.in_use[slot] = 1
+
+        base = slot * REGISTER_COUNT
+        self.registers[base:base + REGISTER_COUNT] = array("d", [0.0] * REGISTER_COUNT)
+        base = slot * MEMORY_SIZE
+        self.memory[base:base + MEMORY_SIZE] = array("d", [0.0] * MEMORY_SIZE)
+        self.genomes[slot] = genome
+        self.programs[slot] = None
+
+        totals = self.totals.get(species_id)
+        if totals is None:
+            totals = self.totals[species_id] = [0, 0, 0.0, 0.0]
+        totals[COUNT] += 1
+        totals[ENERGY_SUM] += self.energy[slot]
+        totals[METABOLISM_SUM] += self.metabolism[slot]
+
+        self.count += 1
+        return self.views[slot]
+
+    def release(self, slot: int) -> None:
+        if not self.in_use[slot]:
+            return
+
+        totals = self.totals[self.species[slot]]
+        totals[COUNT] -= 1
+        if totals[COUNT] == 0:
+            # Start the sums from scratch so rounding cannot accumulate
+            # across extinctions.
+            totals[AGE_SUM] = 0
+            totals[ENERGY_SUM] = 0.0
+            totals[METABOLISM_SUM] = 0.0
+        else:
+            totals[AGE_SUM] -= self.age[slot]
+            totals[ENERGY_SUM] -= self.energy[slot]
+            totals[METABOLISM_SUM] -= self.metabolism[slot]
+
+        self.in_use[slot] = 0
+        self.genomes[slot] = []
+        self.programs[slot] = None
+        self.free_slots.append(slot)
+        self.count -= 1
+
+    def export_state(self, slot: int) -> tuple:
+        # The complete state of one organism as plain values: its columns in
+        # STATE_COLUMNS order, registers, memory and genome.
+        registers = slot * REGISTER_COUNT
+        memory = slot * MEMORY_SIZE
+        return (
+            tuple(getattr(self, name)[slot] for name in STATE_COLUMNS),
+            self.registers[registers:registers + REGISTER_COUNT].tolist(),
+            self.memory[memory:memory + MEMORY_SIZE].tolist(),
+            list(self.genomes[slot]),
+        )
+
+    def import_state(self, state: tuple) -> Life:
+        # Recreates an organism from export_state in a free slot.
+        columns, registers, memory, genome = state
+        slot = self.free_slots.pop() if self.free_slots else self._grow()
+
+        for name, value in zip(STATE_COLUMNS, columns):
+            getattr(self, name)[slot] = value
+        self.in_use[slot] = 1
+
+        base = slot * REGISTER_COUNT
+        self.registers[base:base + REGISTER_COUNT] = array("d", registers)
+        base = slot * MEMORY_SIZE
+        self.memory[base:base + MEMORY_SIZE] = array("d", memory)
+        self.genomes[slot] = genome
+        self.programs[slot] = None
+
+        totals = self.totals.get(self.species[slot])
+        if totals is None:
+            totals = self.totals[self.species[slot]] = [0, 0, 0.0, 0.0]
+        totals[COUNT] += 1
+        totals[AGE_SUM] += self.age[slot]
+        totals[ENERGY_SUM] += self.energy[slot]
+        totals[METABOLISM_SUM] += self.metabolism[slot]
+
+        self.count += 1
+        return self.views[slot]
+
+    def export_arrays(self) -> dict:
+        # Every slot, free ones included, as typed arrays: the columns, the
+        # register and memory banks, the genome lengths with the genomes laid
+        # end to end, and the free slots in the order they will be reused.
+        genes = array("h")
+        for genome in self.genomes:
+            genes.extend(genome)
+
+        arrays = {name: getattr(self, name) for name, _ in COLUMNS}
+        arrays["registers"] = self.registers
+        arrays["memory"] = self.memory
+        arrays["genome_lengths"] = array("i", [len(genome) for genome in self.genomes])
+        arrays["genomes"] = genes
+        arrays["free_slots"] = array("i", self.free_slots)
+        return arrays
+
+    def import_arrays(self, arrays: dict, totals: dict[int, list]) -> None:
+        # Replaces the population with one from export_arrays and the
+        # species totals it had, slot for slot, so organisms act in the same
+        # order and children take the same slots as they would have before.
+        self.clear()
+        for name, _ in COLUMNS:
+            getattr(self, name).extend(arrays[name])
+        self.registers.extend(arrays["registers"])
+        self.memory.extend(arrays["memory"])
+
+        genes = arrays["genomes"].tolist()
+        start = 0
+        for length in arrays["genome_lengths"]:
+            self.genomes.append(genes[start:start + length])
+            start += length
+
+        capacity = len(self.in_use)
+        self.programs.extend([None] * capacity)
+        self.views.extend(self.life_class(self, slot) for slot in range(capacity))
+        self.free_slots.extend(arrays["free_slots"])
+        self.count = capacity - self.in_use.count(0)
+        self.totals.update((species_id, list(values)) for species_id, values in totals.items())
+
+    def _arrays(self, *names):
+        return [
+            np.frombuffer(getattr(self, name), dtype=_NUMPY_DTYPES[getattr(self, name).typecode])
+            for name in names
+        ]
+
+    def advance_metabolism(self, pollution_level: float, streams, tick: int) -> list[Life]:
+        # Ages every organism, charges its metabolism and applies the
+        # pollution hazard in one pass, returning the organisms that died.
+        # Organisms that reach their lifespan do not pay metabolism, and only
+        # organisms that survive both checks are exposed to pollution, each
+        # drawing from its own stream of `streams`.
+        if self.count == 0:
+            return []
+
+        if np is not None:
+            survivors, died = self._advance_metabolism_arrays()
+        else:
+            survivors, died = self._advance_metabolism_loop()
+
+        hazard = 0.002 * pollution_level
+        organism_id = self.organism_id
+        idents = [organism_id[slot] for slot in survivors]
+        for index in streams.hits(tick, POLLUTION_STREAM, idents, hazard):
+            slot = survivors[index]
+            self.totals[self.species[slot]][ENERGY_SUM] -= self.energy[slot]
+            self.energy[slot] = 0.0
+            self.death_cause[slot] = POLLUTION
+            died.append(slot)
+
+        return [self.views[slot] for slot in sorted(died)]
+
+    def _advance_metabolism_arrays(self) -> tuple[list[int], list[int]]:
+        in_use, energy, age, lifespan, metabolism, cause, species = self._arrays(
+            "in_use", "energy", "age", "lifespan", "metabolism", "death_cause", "species"
+        )
+
+        live = (in_use != 0) & (energy > 0.0) & (age <= lifespan)
+        age[live] += 1
+
+        old = live & (age > lifespan)
+        rest = live & ~old
+        energy[rest] -= metabolism[rest]
+
+        starving = rest & (energy <= 0.0)
+        cause[old] = INTRINSIC
+        cause[starving] = STARVATION
+
+        for species_id, totals in self.totals.items():
+            of_species = species == species_id
+            totals[AGE_SUM] += int(np.count_nonzero(live & of_species))
+            totals[ENERGY_SUM] -= float(metabolism[rest & of_species].sum())
+
+        survivors = np.flatnonzero(rest & ~starving).tolist()
+        died = np.flatnonzero(old | starving).tolist()
+        return survivors, died
+
+    def _advance_metabolism_loop(self) -> tuple[list[int], list[int]]:
+        energy = self.energy
+        age = self.age
+        lifespan = self.lifespan
+        metabolism = self.metabolism
+        cause = self.death_cause
+        species = self.species
+        totals = self.totals
+        survivors = []
+        died = []
+
+        for slot, used in enumerate(self.in_use):
+            if not used or energy[slot] <= 0.0 or age[slot] > lifespan[slot]:
+                continue
+
+            species_totals = totals[species[slot]]
+            age[slot] += 1
+            species_totals[AGE_SUM] += 1
+            if age[slot] > lifespan[slot]:
+                cause[slot] = INTRINSIC
+                died.append(slot)
+                continue
+
+            energy[slot] -= metabolism[slot]
+            species_totals[ENERGY_SUM] -= metabolism[slot]
+            if energy[slot] <= 0.0:
+                cause[slot] = STARVATION
+                died.append(slot)
+                continue
+
+            survivors.append(slot)
+
+        return survivors, died
+
+    def dead_slots(self) -> list[int]:
+        if np is not None and self.count:
+            in_use, energy, age, lifespan = self._arrays("in_use", "energy", "age", "lifespan")
+            dead = (in_use != 0) & ((energy <= 0.0) | (age > lifespan))
+            return np.flatnonzero(dead).tolist()
+
+        energy = self.energy
+        age = self.age
+        lifespan = self.lifespan
+        return [
+            slot for slot, used in enumerate(self.in_use)
+            if used and (energy[slot] <= 0.0 or age[slot] > lifespan[slot])
+        ]
+
+    def positions(self):
+        # x, y and species arrays of every living organism, for bulk
+        # consumers such as the renderer.  Requires numpy.
+        in_use, energy, age, lifespan, x, y, species = self._arrays(
+            "in_use", "energy", "age", "lifespan", "x", "y", "species",
+        )
+        alive = (in_use != 0) & (energy > 0.0) & (age <= lifespan)
+        return x[alive], y[alive], species[alive]
+
+    def cull(self) -> list[tuple[int, str]]:
+        # Frees the slots of dead organisms for reuse and reports each one as
+        # (species_id, cause).  Organisms without a recorded cause died of
+        # old age if they outlived their lifespan and of starvation otherwise.
+        removed = []
+        for slot in self.dead_slots():
+            cause = DEATH_CAUSES[self.death_cause[slot]]
+            if cause is None:
+                cause = "intrinsic" if self.age[slot] > self.lifespan[slot] else "starvation"
+            removed.append((self.species[slot], cause))
+            self.release(slot)
+        return removed
\ No newline at end of file
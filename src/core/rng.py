@@ -0,0 +1,116 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+MASK64 = (1 << 64) - 1
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+MIX_1 = 0xBF58476D1CE4E5B9
+MIX_2 = 0x94D049BB133111EB
+
+# What a stream is used for, so draws for different purposes on the same
+# tick and organism never share values.
+SPAWN = 1
+ACT = 2
+POLLUTION = 3
+FOOD = 4
+
+# The ident of streams that belong to the world rather than an organism.
+WORLD = 0
+
+
+def mix64(value: int) -> int:
+    # The SplitMix64 finalizer, a bijection on 64 bit integers.
+    value = ((value ^ (value >> 30)) * MIX_1) & MASK64
+    value = ((value ^ (value >> 27)) * MIX_2) & MASK64
+    return value ^ (value >> 31)
+
+
+def derive_key(key: int, value: int) -> int:
+    # Folds one more component into a stream key.
+    return mix64(((key ^ mix64((value + GOLDEN_GAMMA) & MASK64)) + GOLDEN_GAMMA) & MASK64)
+
+
+def _mix64_array(values):
+    # mix64 over a uint64 array; the products wrap exactly like the masked
+    # integer version.
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(MIX_1)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(MIX_2)
+    return values ^ (values >> np.uint64(31))
+
+
+class Stream:
+    # A counter-based stream: the n-th value is mix64(key + n * gamma), so a
+    # stream is fully described by its key and how many values it has given
+    # out.  Provides the part of the random module the simulation uses.
+    __slots__ = ("key", "counter")
+
+    def __init__(self, key: int) -> None:
+        self.key = key
+        self.counter = 0
+
+    def next64(self) -> int:
+        self.counter += 1
+        return mix64((self.key + self.counter * GOLDEN_GAMMA) & MASK64)
+
+    def random(self) -> float:
+        return (self.next64() >> 11) * (1.0 / 9007199254740992.0)
+
+    def below(self, n: int) -> int:
+        # An integer in range(n); the bias is below n / 2**64.
+        return (self.next64() * n) >> 64
+
+    def randint(self, a: int, b: int) -> int:
+        return a + self.below(b - a + 1)
+
+    def uniform(self, a: float, b: float) -> float:
+        return a + (b - a) * self.random()
+
+    def choice(self, seq):
+        return seq[self.below(len(seq))]
+
+
+class RngStreams:
+    # Every random draw of a simulator comes from a stream keyed by (seed,
+    # tick, ident, purpose), where ident is an organism id or WORLD.  What an
+    # organism draws on a tick therefore does not depend on which organisms
+    # acted before it, or in which process.
+    def __init__(self, seed: int) -> None:
+        self.seed = seed & MASK64
+        self.root = mix64(self.seed)
+
+    def tick_key(self, tick: int, purpose: int) -> int:
+        return derive_key(derive_key(self.root, purpose), tick)
+
+    def key(self, tick: int, ident: int, purpose: int) -> int:
+        return derive_key(self.tick_key(tick, purpose), ident)
+
+    def stream(self, tick: int, ident: int, purpose: int) -> Stream:
+        return Stream(self.key(tick, ident, purpose))
+
+    def numpy_generator(self, tick: int, ident: int, purpose: int):
+        # A NumPy Generator on Philox, itself counter-based, keyed the same
+        # way.  Requires numpy.
+        return np.random.Generator(np.random.Philox(key=self.key(tick, ident, purpose)))
+
+    def hits(self, tick: int, purpose: int, idents, probability: float) -> list[int]:
+        # Indices into idents whose first draw of the given stream falls
+        # below probability, one independent trial per ident.
+        if probability <= 0.0 or not len(idents):
+            return []
+
+        tick_key = self.tick_key(tick, purpose)
+        threshold = int(probability * 9007199254740992.0)
+
+        if np is not None:
+            gamma = np.uint64(GOLDEN_GAMMA)
+            values = _mix64_array(np.asarray(idents, dtype="uint64") + gamma)
+            keys = _mix64_array((np.uint64(tick_key) ^ values) + gamma)
+            draws = _mix64_array(keys + gamma) >> np.uint64(11)
+            return np.flatnonzero(draws < np.uint64(threshold)).tolist()
+
+        return [
+            index for index, ident in enumerate(idents)
+            if Stream(derive_key(tick_key, ident)).next64() >> 11 < threshold
+        ]
\ No newline at end of file
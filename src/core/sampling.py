@@ -0,0 +1,30 @@
+import math
+
+
+def sample_indices(rng, count: int, probability: float):
+    # Yields each index in range(count) independently with the given
+    # probability, jumping over the misses with geometrically distributed
+    # gaps so the cost follows the number of hits rather than count.  rng is
+    # anything with a random() method.
+    if probability <= 0.0 or count <= 0:
+        return
+    if probability >= 1.0:
+        yield from range(count)
+        return
+
+    log_miss = math.log(1.0 - probability)
+    index = -1
+
+    while True:
+        index += 1 + int(math.log(1.0 - rng.random()) / log_miss)
+        if index >= count:
+            return
+        yield index
+
+
+def sample_indices_array(rng, count: int, probability: float):
+    # Same distribution as sample_indices, drawn with a NumPy Generator: a
+    # binomial number of hits placed without replacement.
+    probability = min(1.0, max(0.0, probability))
+    hits = rng.binomial(count, probability)
+    return rng.choice(count, size=hits, replace=False)
\ No newline at end of file
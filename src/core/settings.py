@@ -0,0 +1,129 @@
+import copy
+import json
+from dataclasses import dataclass, field, fields, replace
+from pathlib import Path
+
+import config
+
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+
+GRID_BACKENDS = ("list", "numpy", "chunked")
+
+
+@dataclass(frozen=True)
+class Settings:
+    # Everything that shapes one simulated world.  Each simulator holds its
+    # own instance and hands it to the world, VM and behaviors, so several
+    # simulators with different settings can share a process.  Field names
+    # are the lower case names of the config.py defaults they start from.
+    #
+    # Process wide knobs (stats buffering, profiling, window and runner
+    # options) stay in config.py.
+    world_width: int
+    world_height: int
+    grid_backend: str
+    chunk_size: int
+    max_food_units: int
+    food_regen_probability: float
+    food_decay_probability: float
+    food_regen_increment: int
+    food_decay_decrement: int
+    food_consumption_per_event: int
+    food_to_energy_factor: float
+    initial_population_a: int
+    initial_population_b: int
+    predation_energy_gain_b: float
+    species_parameters: dict
+    mutation_probability: float
+    pollution_increment_per_life: float
+    pollution_recovery_per_tick: float
+    pollution_cap: float
+    predator_search_radius: int
+    prey_field_enabled: bool
+    spatial_bucket_size: int | None
+    predator_trace_decay: float
+    predator_trace_deposit: float
+    predator_trace_bonus: float
+    predator_prey_weight: float
+    predator_revisit_penalty: float
+    predator_tumble_prob: float
+    predator_random_noise: float
+    predator_run_bonus: int
+    predator_heading_bonus: float
+    predator_max_step: int | None
+
+    # Derived from the fields above.
+    max_x: int = field(init=False)
+    max_y: int = field(init=False)
+    area: int = field(init=False)
+
+    def __post_init__(self) -> None:
+        if self.grid_backend not in GRID_BACKENDS:
+            raise ValueError(f"Unknown grid_backend: {self.grid_backend!r}")
+        if self.world_width <= 0 or self.world_height <= 0:
+            raise ValueError("world_width and world_height must be positive")
+        if self.chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        if self.predator_max_step is not None and self.predator_max_step <= 0:
+            raise ValueError("predator_max_step must be positive")
+
+        object.__setattr__(self, "max_x", self.world_width - 1)
+        object.__setattr__(self, "max_y", self.world_height - 1)
+        object.__setattr__(self, "area", self.world_width * self.world_height)
+
+    @classmethod
+    def from_config(cls, **changes) -> "Settings":
+        # The current values of config.py, read at call time so code that
+        # adjusts config before creating a simulator keeps working.
+        values = {
+            f.name: copy.deepcopy(getattr(config, f.name.upper()))
+            for f in fields(cls) if f.init
+        }
+        values.update(changes)
+        return cls(**values)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Settings":
+        # Keys may use either the settings or the config.py spelling, and
+        # species_parameters may be keyed by species id strings as JSON and
+        # TOML require.  Anything not given keeps its config.py default.
+        names = {f.name for f in fields(cls) if f.init}
+        changes = {}
+        for key, value in data.items():
+            name = key.lower()
+            if name not in names:
+                raise ValueError(f"Unknown setting: {key!r}")
+            changes[name] = value
+
+        species = changes.get("species_parameters")
+        if species is not None:
+            defaults = copy.deepcopy(config.SPECIES_PARAMETERS)
+            for species_id, parameters in species.items():
+                defaults.setdefault(int(species_id), {}).update(parameters)
+            changes["species_parameters"] = defaults
+
+        return cls.from_config(**changes)
+
+    @classmethod
+    def from_file(cls, path) -> "Settings":
+        path = Path(path)
+        if path.suffix == ".toml":
+            if tomllib is None:
+                raise RuntimeError("Reading TOML settings requires Python 3.11 or the tomli package")
+            with path.open("rb") as f:
+                return cls.from_dict(tomllib.load(f))
+        with path.open(encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def replace(self, **changes) -> "Settings":
+        return replace(self, **changes)
+
+    def species(self, species_id: int) -> dict:
+        return self.species_parameters[species_id]
\ No newline at end of file
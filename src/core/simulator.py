@@ -1,13 +1,18 @@
 import random
 
 import config
-from core.life import Life
+from core.population import Population
+from core.rng import SPAWN, RngStreams
+from core.settings import Settings
 from core.world import (
     create_initial_food_grid,
+    food_total,
     regenerate_food,
-    create_trace_grid,
-    decay_trace_grid,
 )
+from core.timing import PhaseTimer
+from core.trace import TraceField
+from genetics.prey_field import create_prey_field
+from genetics.profiler import OpcodeProfiler
 import genetics.vm as vm
 from genetics.vm import (
     MOVE_RANDOM,
@@ -18,18 +23,48 @@ from genetics.vm import (
     SENSE_PREY_DIRECTION,
     JUMP,
 )
-from core.stats import StatsCollector
+from core.stats import StatsCollector, StatsSnapshot
+
+
+def next_pollution_level(settings: Settings, level: float, living_count: int) -> float:
+    pollution_increment = settings.pollution_increment_per_life * living_count
+    pollution_recovery = settings.pollution_recovery_per_tick
+    return max(
+        0.0,
+        min(
+            level + pollution_increment - pollution_recovery,
+            settings.pollution_cap,
+        ),
+    )
+
+
+def _organism_id(organism) -> int:
+    return organism.organism_id
 
 
 class GenesisSimulator:
-    def __init__(self) -> None:
+    # settings defaults to a snapshot of config.py taken when the simulator
+    # is created; everything a run depends on is read from it rather than
+    # from the config module, so simulators do not share any world state.
+    def __init__(self, settings: Settings | None = None) -> None:
+        self.settings = settings if settings is not None else Settings.from_config()
+        self.seed = 0
+        self.streams = RngStreams(0)
         self.food_grid = []
-        self.trace_grid = []
-        self.life_list = []
+        self.food_total = 0
+        self.pollution = 0.0
+        self.trace_field = TraceField(self.settings.predator_trace_decay)
+        self.population = Population()
+        self.spatial = vm.SpatialIndex(self.population, self.settings)
         self.tick = 0
         self.running = False
         self.stats = StatsCollector()
+        self.timer = PhaseTimer() if config.PROFILE_PHASES else None
+        self.opcode_profiler = OpcodeProfiler() if config.PROFILE_OPCODES else None
         self.tick_stats = self._make_empty_tick_stats()
+        # Organisms alive at the start of the current tick, between
+        # start_step() and act().
+        self.acting = []
 
     def _make_empty_tick_stats(self) -> dict:
         return {
@@ -80,59 +115,77 @@ class GenesisSimulator:
         return genome[:length]
 
     def _spawn_initial_population(self) -> None:
-        params_A = config.SPECIES_PARAMETERS[config.SPECIES_A]
-        for _ in range(config.INITIAL_POPULATION_A):
-            x = random.randint(0, config.WORLD_WIDTH - 1)
-            y = random.randint(0, config.WORLD_HEIGHT - 1)
-            organism = Life(
-                x=x,
-                y=y,
-                energy=random.randint(params_A["energy_min"], params_A["energy_max"]),
-                lifespan=random.randint(
-                    params_A["lifespan_min"],
-                    params_A["lifespan_max"],
-                ),
-                metabolism=random.uniform(
-                    params_A["metabolism_min"],
-                    params_A["metabolism_max"],
-                ),
-                mobility=random.uniform(
-                    params_A["mobility_min"],
-                    params_A["mobility_max"],
-                ),
-                generation=0,
-                species_id=config.SPECIES_A,
-                genome=self.make_initial_genome_A(),
-            )
-            self.life_list.append(organism)
-
-        params_B = config.SPECIES_PARAMETERS[config.SPECIES_B]
-        for _ in range(config.INITIAL_POPULATION_B):
-            x = random.randint(0, config.WORLD_WIDTH - 1)
-            y = random.randint(0, config.WORLD_HEIGHT - 1)
-            organism = Life(
-                x=x,
-                y=y,
-                energy=random.randint(params_B["energy_min"], params_B["energy_max"]),
-                lifespan=random.randint(
-                    params_B["lifespan_min"],
-                    params_B["lifespan_max"],
-                ),
-                metabolism=random.uniform(
-                    params_B["metabolism_min"],
-                    params_B["metabolism_max"],
-                ),
-                mobility=random.uniform(
-                    params_B["mobility_min"],
-                    params_B["mobility_max"],
-                ),
-                generation=0,
-                species_id=config.SPECIES_B,
-                genome=self.make_initial_genome_B(),
-            )
-            self.life_list.append(organism)
+        # Initial organisms are numbered 0, 1, ... with species A first, and
+        # draw their traits from their SPAWN stream of tick 0.
+        settings = self.settings
+        organism_id = 0
+        for species_id, count, make_genome in (
+            (config.SPECIES_A, settings.initial_population_a, self.make_initial_genome_A),
+            (config.SPECIES_B, settings.initial_population_b, self.make_initial_genome_B),
+        ):
+            params = settings.species(species_id)
+            for _ in range(count):
+                self._spawn_initial(organism_id, species_id, params, 0, settings.max_y, make_genome())
+                organism_id += 1
+
+    def _spawn_initial(
+        self,
+        organism_id: int,
+        species_id: int,
+        params: dict,
+        y0: int,
+        y1: int,
+        genome: list[int],
+    ):
+        # One initial organism on a row in [y0, y1].
+        rng = self.streams.stream(0, organism_id, SPAWN)
+        return self.population.spawn(
+            x=rng.randint(0, self.settings.max_x),
+            y=rng.randint(y0, y1),
+            energy=rng.randint(params["energy_min"], params["energy_max"]),
+            lifespan=rng.randint(params["lifespan_min"], params["lifespan_max"]),
+            metabolism=rng.uniform(params["metabolism_min"], params["metabolism_max"]),
+            mobility=rng.uniform(params["mobility_min"], params["mobility_max"]),
+            generation=0,
+            species_id=species_id,
+            genome=genome,
+            organism_id=organism_id,
+        )
+
+    def _count_births(self, new_offspring: list) -> None:
+        for child in new_offspring:
+            if child.species_id == config.SPECIES_A:
+                self.tick_stats["birth_a"] += 1
+                if child.was_mutated:
+                    self.tick_stats["mutations_a"] += 1
+            else:
+                self.tick_stats["birth_b"] += 1
+                if child.was_mutated:
+                    self.tick_stats["mutations_b"] += 1
+
+    def _count_deaths(self, culled: list) -> None:
+        for species_id, cause in culled:
+            if species_id == config.SPECIES_A:
+                self.tick_stats["death_a"] += 1
+                if cause == "intrinsic":
+                    self.tick_stats["intrinsic_death_a"] += 1
+                elif cause == "starvation":
+                    self.tick_stats["starvation_death_a"] += 1
+                elif cause == "predation":
+                    self.tick_stats["predation_death_a"] += 1
+                elif cause == "pollution":
+                    self.tick_stats["pollution_death_a"] += 1
+            else:
+                self.tick_stats["death_b"] += 1
+                if cause == "intrinsic":
+                    self.tick_stats["intrinsic_death_b"] += 1
+                elif cause == "starvation":
+                    self.tick_stats["starvation_death_b"] += 1
+                elif cause == "pollution":
+                    self.tick_stats["pollution_death_b"] += 1
 
     def _apply_predation(self, spatial: vm.SpatialIndex) -> None:
+        energy_gain = self.settings.predation_energy_gain_b
         for occupants in spatial.by_cell.values():
             predators = [
                 o for o in occupants
@@ -146,115 +199,181 @@ class GenesisSimulator:
             if not predators or not prey:
                 continue
 
+            # Paired by organism id rather than by the order they entered
+            # the cell, which depends on the order organisms acted in.
+            if len(predators) > 1:
+                predators.sort(key=_organism_id)
+            if len(prey) > 1:
+                prey.sort(key=_organism_id)
+
             interactions = min(len(predators), len(prey))
             for i in range(interactions):
                 predator = predators[i]
                 victim = prey[i]
                 victim.death_cause = "predation"
                 victim.energy = 0.0
-                predator.energy += config.PREDATION_ENERGY_GAIN_B
+                predator.energy += energy_gain
                 spatial.remove(victim)
 
-    def reset(self) -> None:
-        self.food_grid = create_initial_food_grid()
-        self.trace_grid = create_trace_grid()
-        self.life_list = []
+    @property
+    def life_list(self) -> list:
+        return list(self.population)
+
+    def enable_phase_timing(self, history_limit: int | None = None) -> PhaseTimer:
+        self.timer = PhaseTimer(history_limit)
+        return self.timer
+
+    def enable_opcode_profiling(self, sample_every: int | None = None) -> OpcodeProfiler:
+        self.opcode_profiler = OpcodeProfiler(sample_every)
+        return self.opcode_profiler
+
+    def reset(self, seed: int | None = None) -> None:
+        # Without a seed one is drawn from the random module, so
+        # random.seed() still controls a whole run.
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.streams = RngStreams(self.seed)
+        self.food_grid = create_initial_food_grid(self.settings, self.streams)
+        self.food_total = food_total(self.food_grid)
+        self.trace_field.reset()
+        self.population.clear()
         self.tick = 0
         self.running = True
-        config.global_pollution_level = 0.0
+        self.pollution = 0.0
         self.tick_stats = self._make_empty_tick_stats()
         self._spawn_initial_population()
+        self.spatial = vm.SpatialIndex(self.population, self.settings)
+        self.spatial.rebuild()
+        self.spatial.prey_field = create_prey_field(self.settings)
+        if self.spatial.prey_field is not None:
+            self.spatial.prey_field.rebuild(
+                o for o in self.population if o.species_id == config.SPECIES_A
+            )
         self.stats.reset()
+        if self.timer is not None:
+            self.timer.reset()
+        if self.opcode_profiler is not None:
+            self.opcode_profiler.reset()
 
     def step(self) -> None:
+        # A tick is start_step(), the prey field refresh, act(), food
+        # regeneration and finish_step(); EnsembleSimulator runs the parts
+        # itself to do the grid work of all its worlds at once.
         if not self.running:
             return
 
+        self.start_step()
+
+        if self.spatial.prey_field is not None:
+            self.spatial.prey_field.refresh()
+        if self.timer is not None:
+            self.timer.mark("spatial")
+
+        self.act()
+
+        self.food_total += regenerate_food(
+            self.food_grid,
+            self.settings,
+            self.pollution,
+            self.streams,
+            self.tick,
+        )
+        if self.timer is not None:
+            self.timer.mark("food")
+
+        self.finish_step()
+
+    def start_step(self, pollution: float | None = None) -> None:
+        # Starts the next tick and runs it up to the prey field refresh.
+        # The tick's pollution level is computed here unless given.
+
+        # With timing disabled the only cost is one None check per phase.
+        timer = self.timer
+        if timer is not None:
+            timer.start(self.tick + 1)
+
         self.tick += 1
         self.tick_stats = self._make_empty_tick_stats()
 
-        living_count = len(self.life_list)
-        pollution_increment = config.POLLUTION_INCREMENT_PER_LIFE * living_count
-        pollution_recovery = config.POLLUTION_RECOVERY_PER_TICK
+        if pollution is None:
+            pollution = next_pollution_level(
+                self.settings,
+                self.pollution,
+                len(self.population),
+            )
+        self.pollution = pollution
 
-        config.global_pollution_level = max(
-            0.0,
-            min(
-                config.global_pollution_level + pollution_increment - pollution_recovery,
-                config.POLLUTION_CAP,
-            ),
-        )
+        if timer is not None:
+            timer.mark("pollution")
+
+        self.trace_field.advance()
+        if timer is not None:
+            timer.mark("trace")
+
+        self.acting = list(self.population)
+        spatial = self.spatial
+        spatial.retune()
+        if timer is not None:
+            timer.mark("spatial")
 
-        decay_trace_grid(self.trace_grid)
+        for organism in self.population.advance_metabolism(self.pollution, self.streams, self.tick):
+            spatial.remove(organism)
+        if timer is not None:
+            timer.mark("metabolism")
 
+    def act(self) -> None:
+        # Runs the VM for the organisms alive at the start of the tick, then
+        # births, predation and culling.
+        timer = self.timer
+        spatial = self.spatial
+        acting = self.acting
+        self.acting = []
         new_offspring = []
-        spatial = vm.SpatialIndex(self.life_list)
-
-        for organism in self.life_list:
-            organism.death_cause = None
-            vm.execute(
-                organism,
-                self.food_grid,
-                spatial,
-                self.trace_grid,
-                new_offspring,
-                self.tick_stats,
-            )
 
-        for child in new_offspring:
-            if child.species_id == config.SPECIES_A:
-                self.tick_stats["birth_a"] += 1
-                if getattr(child, "was_mutated", False):
-                    self.tick_stats["mutations_a"] += 1
-            else:
-                self.tick_stats["birth_b"] += 1
-                if getattr(child, "was_mutated", False):
-                    self.tick_stats["mutations_b"] += 1
-        
-        self.life_list.extend(new_offspring)
-        self._apply_predation(spatial)
+        context = vm.ExecutionContext(
+            self.settings,
+            self.streams,
+            self.tick,
+            self.food_grid,
+            spatial,
+            self.trace_field,
+            new_offspring,
+            self.tick_stats,
+            self.opcode_profiler,
+        )
 
-        alive = []
-        for organism in self.life_list:
-            if not organism.is_dead():
-                alive.append(organism)
-                continue
+        for organism in acting:
+            vm.execute(organism, context)
 
-            if organism.species_id == config.SPECIES_A:
-                self.tick_stats["death_a"] += 1
-            else:
-                self.tick_stats["death_b"] += 1
+        self.food_total -= context.food_eaten
+        if self.opcode_profiler is not None:
+            self.opcode_profiler.record_tick(self.tick, self.tick_stats)
+        if timer is not None:
+            timer.mark("vm")
 
-            cause = getattr(organism, "death_cause", None)
-            if cause is None:
-                if organism.age_ticks > organism.lifespan_ticks:
-                    cause = "intrinsic"
-                else:
-                    cause = "starvation"
+        self._count_births(new_offspring)
+        if timer is not None:
+            timer.mark("offspring")
 
-            if organism.species_id == config.SPECIES_A:
-                if cause == "intrinsic":
-                    self.tick_stats["intrinsic_death_a"] += 1
-                elif cause == "starvation":
-                    self.tick_stats["starvation_death_a"] += 1
-                elif cause == "predation":
-                    self.tick_stats["predation_death_a"] += 1
-                elif cause == "pollution":
-                    self.tick_stats["pollution_death_a"] += 1
-            else:
-                if cause == "intrinsic":
-                    self.tick_stats["intrinsic_death_b"] += 1
-                elif cause == "starvation":
-                    self.tick_stats["starvation_death_b"] += 1
-                elif cause == "pollution":
-                    self.tick_stats["pollution_death_b"] += 1
+        self._apply_predation(spatial)
+        if timer is not None:
+            timer.mark("predation")
 
-        self.life_list = alive
-        regenerate_food(self.food_grid)
-        self.stats.capture(self)
+        self._count_deaths(self.population.cull())
+        if timer is not None:
+            timer.mark("cull")
 
-        if not self.life_list:
+    def finish_step(self) -> StatsSnapshot | None:
+        # Captures the tick's stats, returning the snapshot if one was taken.
+        timer = self.timer
+        snapshot = self.stats.capture(self)
+        if timer is not None:
+            timer.mark("stats")
+            timer.finish()
+
+        if not self.population:
             self.running = False
 
+        return snapshot
+
     def is_extinct(self) -> bool:
-        return not self.life_list
\ No newline at end of file
+        return not self.population
\ No newline at end of file
@@ -1,7 +1,8 @@
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, fields
 import csv
 from pathlib import Path
 import config
+from core.history import ColumnarHistory
 
 @dataclass
 class StatsSnapshot:
@@ -36,30 +37,107 @@ class StatsSnapshot:
     dominant_opcode_b: int | None
 
 
+FIELDNAMES = [field.name for field in fields(StatsSnapshot)]
+
+
+class CsvStatsSink:
+    def __init__(self, path, flush_interval: int) -> None:
+        output_path = Path(path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.flush_interval = max(1, flush_interval)
+        self.buffer: list[list] = []
+        self.file = output_path.open("w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(FIELDNAMES)
+
+    def write(self, snapshot: StatsSnapshot) -> None:
+        self.buffer.append([getattr(snapshot, name) for name in FIELDNAMES])
+        if len(self.buffer) >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.buffer:
+            self.writer.writerows(self.buffer)
+            self.buffer.clear()
+        self.file.flush()
+
+    def close(self) -> None:
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+
+
 class StatsCollector:
-    def __init__(self) -> None:
-        self.history: list[StatsSnapshot] = []
+    # history is a ColumnarHistory of every snapshot unless history_limit is
+    # set, in which case it only keeps the most recent ones (enough for the
+    # UI panels).
+    # A sink opened with stream_to receives every captured snapshot, so long
+    # runs can be exported without holding them in memory.
+    def __init__(self, capture_stride: int | None = None, history_limit: int | None = None) -> None:
+        if capture_stride is None:
+            capture_stride = config.STATS_CAPTURE_STRIDE
+        if history_limit is None:
+            history_limit = config.STATS_HISTORY_LIMIT
+
+        self.capture_stride = max(1, capture_stride)
+        self.history_limit = history_limit
+        self.history = ColumnarHistory(StatsSnapshot, history_limit)
+        self.sink: CsvStatsSink | None = None
 
     def reset(self) -> None:
         self.history.clear()
 
-    def _mean(self, values) -> float:
-        return sum(values) / len(values) if values else 0.0
+    def stream_to(self, path, flush_interval: int | None = None) -> None:
+        if flush_interval is None:
+            flush_interval = config.STATS_FLUSH_INTERVAL
+        self.close()
+        self.sink = CsvStatsSink(path, flush_interval)
+
+    def close(self) -> None:
+        if self.sink is not None:
+            self.sink.close()
+            self.sink = None
+
+    def _mean(self, total: float, count: int) -> float:
+        return total / count if count else 0.0
 
     def _dominant_opcode(self, counts: dict[int, int]) -> int | None:
         if not counts:
             return None
         return max(counts.items(), key=lambda item: (item[1], -item[0]))[0]
 
-    def capture(self, simulator) -> None:
-        life_list = simulator.life_list
-        food_grid = simulator.food_grid
-        tick_stats = getattr(simulator, "tick_stats", {})
+    def capture(self, simulator) -> StatsSnapshot | None:
+        # Returns the snapshot, or None on ticks between captures.
+        if simulator.tick % self.capture_stride != 0:
+            return None
 
-        a_list = [o for o in life_list if o.species_id == config.SPECIES_A]
-        b_list = [o for o in life_list if o.species_id == config.SPECIES_B]
+        population = simulator.population
+        return self.record(
+            simulator.tick,
+            len(population),
+            population.species_totals(config.SPECIES_A),
+            population.species_totals(config.SPECIES_B),
+            simulator.food_total,
+            simulator.pollution,
+            getattr(simulator, "tick_stats", {}),
+        )
 
-        food_total = sum(sum(row) for row in food_grid)
+    def record(
+        self,
+        tick: int,
+        population_total: int,
+        totals_a: tuple,
+        totals_b: tuple,
+        food_total: int,
+        pollution: float,
+        tick_stats: dict,
+    ) -> StatsSnapshot:
+        # Builds and stores one snapshot from the per-species (count, age
+        # sum, energy sum, metabolism sum) totals and the tick's counters.
+        count_a, age_a, energy_a, metabolism_a = totals_a
+        count_b, age_b, energy_b, metabolism_b = totals_b
 
         birth_a = tick_stats.get("birth_a", 0)
         birth_b = tick_stats.get("birth_b", 0)
@@ -67,24 +145,24 @@ class StatsCollector:
         death_b = tick_stats.get("death_b", 0)
 
         snapshot = StatsSnapshot(
-            tick=simulator.tick,
-            population_total=len(life_list),
-            population_a=len(a_list),
-            population_b=len(b_list),
+            tick=tick,
+            population_total=population_total,
+            population_a=count_a,
+            population_b=count_b,
             food_total=food_total,
-            pollution=config.global_pollution_level,
+            pollution=pollution,
             births=birth_a + birth_b,
             deaths=death_a + death_b,
             birth_a=birth_a,
             birth_b=birth_b,
             death_a=death_a,
             death_b=death_b,
-            avg_age_a=self._mean([o.age_ticks for o in a_list]),
-            avg_age_b=self._mean([o.age_ticks for o in b_list]),
-            avg_energy_a=self._mean([o.energy for o in a_list]),
-            avg_energy_b=self._mean([o.energy for o in b_list]),
-            avg_metabolism_a=self._mean([o.metabolism_rate for o in a_list]),
-            avg_metabolism_b=self._mean([o.metabolism_rate for o in b_list]),
+            avg_age_a=self._mean(age_a, count_a),
+            avg_age_b=self._mean(age_b, count_b),
+            avg_energy_a=self._mean(energy_a, count_a),
+            avg_energy_b=self._mean(energy_b, count_b),
+            avg_metabolism_a=self._mean(metabolism_a, count_a),
+            avg_metabolism_b=self._mean(metabolism_b, count_b),
             intrinsic_death_a=tick_stats.get("intrinsic_death_a", 0),
             intrinsic_death_b=tick_stats.get("intrinsic_death_b", 0),
             starvation_death_a=tick_stats.get("starvation_death_a", 0),
@@ -102,18 +180,11 @@ class StatsCollector:
             ),
         )
         self.history.append(snapshot)
+        if self.sink is not None:
+            self.sink.write(snapshot)
+        return snapshot
 
     def export_history_csv(self, path: str) -> None:
         if not self.history:
             return
-
-        output_path = Path(path)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-
-        rows = [asdict(snapshot) for snapshot in self.history]
-        fieldnames = list(rows[0].keys())
-
-        with output_path.open("w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(rows)
\ No newline at end of file
+        self.history.write_csv(path)
\ No newline at end of file
@@ -0,0 +1,515 @@
+import random
+import warnings
+from multiprocessing import Pipe, Process
+
+import numpy as np
+
+import config
+import genetics.vm as vm
+from core.rng import FOOD, RngStreams
+from core.settings import Settings
+from core.simulator import GenesisSimulator, next_pollution_level
+from core.stats import StatsCollector
+from core.trace import TraceField
+from core.world import _initial_food, _regenerate_cells, _regeneration_probabilities
+
+
+# Lifespan of ghost organisms, long enough that they never count as dead.
+GHOST_LIFESPAN = 1 << 30
+
+UP = "up"
+DOWN = "down"
+
+# How far a move to food can take an organism in one instruction, which is
+# also how far around itself it looks for food.
+FOOD_VISION = 2
+
+# The predator step tiled runs use when the settings leave it unbounded.
+DEFAULT_PREDATOR_MAX_STEP = 1
+
+
+def tiled_settings(settings: Settings, warn: bool = False) -> Settings:
+    # A predator's move follows its registers, so it can cross any number of
+    # rows unless predator_max_step bounds it; strips need that bound.
+    if settings.predator_max_step is None:
+        if warn:
+            warnings.warn(
+                f"PREDATOR_MAX_STEP is not set, tiled runs use {DEFAULT_PREDATOR_MAX_STEP} "
+                "to bound predator moves",
+                stacklevel=3,
+            )
+        return settings.replace(predator_max_step=DEFAULT_PREDATOR_MAX_STEP)
+    return settings
+
+
+def max_displacement(settings: Settings) -> int:
+    # The furthest an organism can move in one tick of the VM, one move per
+    # instruction.
+    return vm.MAX_STEPS * max(FOOD_VISION, settings.predator_max_step)
+
+
+def halo_rows(settings: Settings) -> int:
+    # Rows of a neighbour's strip a worker needs to see: how far an organism
+    # can have moved before its last instruction of the tick, plus how far it
+    # reads from there.  Predators score the cells one step away by the prey
+    # within the search radius of each; prey move and look for food within
+    # FOOD_VISION.  SENSE_PREY's long range check only sees the halo.
+    moves = vm.MAX_STEPS - 1
+    return max(
+        moves * settings.predator_max_step + settings.predator_search_radius + 1,
+        moves * FOOD_VISION + FOOD_VISION,
+    )
+
+
+def strip_bounds(settings: Settings, index: int, strips: int) -> tuple[int, int]:
+    height = settings.world_height
+    return index * height // strips, (index + 1) * height // strips
+
+
+def _share(total: int, index: int, strips: int) -> int:
+    return total * (index + 1) // strips - total * index // strips
+
+
+class StripTraceField(TraceField):
+    # A TraceField that also logs the deposits made outside the owned rows,
+    # so they can be handed to the strip that owns those cells.
+    def __init__(self, decay: float, y0: int, y1: int) -> None:
+        super().__init__(decay)
+        self.y0 = y0
+        self.y1 = y1
+        self.outgoing = []
+
+    def deposit(self, x: int, y: int, amount: float) -> None:
+        super().deposit(x, y, amount)
+        if not self.y0 <= y < self.y1:
+            self.outgoing.append((x, y, amount))
+
+    def rows(self, y0: int, y1: int) -> list:
+        return [
+            (x, y, value, stamp)
+            for (x, y), (value, stamp) in self.cells.items()
+            if y0 <= y < y1
+        ]
+
+    def replace_rows(self, y0: int, y1: int, entries: list) -> None:
+        for key in [key for key in self.cells if y0 <= key[1] < y1]:
+            del self.cells[key]
+        for x, y, value, stamp in entries:
+            self.cells[(x, y)] = (value, stamp)
+
+
+class StripSimulator(GenesisSimulator):
+    # The part of a tiled world that one worker process owns: the rows
+    # [y0, y1) and the organisms on them.  Coordinates stay global, so the
+    # food grid is world sized, but only the owned rows and the halo rows
+    # copied in from the neighbours are ever meaningful.
+    #
+    # A tick runs in three calls from TiledSimulator:
+    #   begin     pollution, trace decay and metabolism; returns the boundary
+    #             rows the neighbours need (organisms, food, trace)
+    #   exchange  installs the neighbours' boundary rows, with their
+    #             organisms as ghosts that can be sensed but never act, runs
+    #             the VM, and returns the organisms that left the strip, the
+    #             food eaten and trace laid on the neighbours' rows, and the
+    #             strip's own boundary rows as its organisms left them
+    #   finish    takes in arrivals and those changes, then predation,
+    #             culling, food regeneration, and returns partial stats
+    #
+    # Food on a boundary row belongs to the strip that owns the row.  Eating
+    # from a neighbour's copy of it is only a claim: the owner grants claims
+    # in order from what its own organisms left, and an organism whose claim
+    # is refused loses the energy it got from it.  Both strips settle the
+    # claims alike from the same rows, so each charges back the claimants it
+    # holds without another round trip.
+    def __init__(self, settings: Settings, index: int, strips: int, seed: int) -> None:
+        settings = tiled_settings(settings)
+        super().__init__(settings)
+        self.index = index
+        self.strips = strips
+        self.seed = seed
+        self.y0, self.y1 = strip_bounds(settings, index, strips)
+        self.halo = halo_rows(settings)
+        self.reach = max_displacement(settings)
+        self.trace_field = StripTraceField(settings.predator_trace_decay, self.y0, self.y1)
+        self.ghosts = []
+        self.boundaries = {}
+        self.installed = {}
+        self.claims = {}
+
+    def reset(self) -> None:
+        # Every strip shares the run's seed, so an organism draws from the
+        # same streams whichever strip it is on; only the food streams are
+        # per strip.
+        self.streams = RngStreams(self.seed)
+
+        width = self.settings.world_width
+        rng = self.streams.numpy_generator(0, self.index, FOOD)
+        self.food_grid = np.zeros((self.settings.world_height, width), dtype="uint8")
+        self.food_grid[self.y0:self.y1] = _initial_food(rng, (self.y1 - self.y0, width))
+        self.trace_field.reset()
+        self.population.clear()
+        self.tick = 0
+        self.running = True
+        self.tick_stats = self._make_empty_tick_stats()
+        self._spawn_strip_population()
+        self.spatial = vm.SpatialIndex(self.population, self.settings)
+        self.spatial.rebuild()
+
+    def _spawn_strip_population(self) -> None:
+        # The strip's share of the initial organisms, numbered as in
+        # GenesisSimulator so ids are unique across strips.
+        settings = self.settings
+        first_id = 0
+        for species_id, total, make_genome in (
+            (config.SPECIES_A, settings.initial_population_a, self.make_initial_genome_A),
+            (config.SPECIES_B, settings.initial_population_b, self.make_initial_genome_B),
+        ):
+            params = settings.species(species_id)
+            start = first_id + total * self.index // self.strips
+            for organism_id in range(start, start + _share(total, self.index, self.strips)):
+                self._spawn_initial(organism_id, species_id, params, self.y0, self.y1 - 1, make_genome())
+            first_id += total
+
+    def _boundary(self, y0: int, y1: int) -> tuple:
+        organisms = [
+            (o.x, o.y, o.species_id) for o in self.population
+            if y0 <= o.y < y1 and not o.is_dead()
+        ]
+        return organisms, y0, self.food_grid[y0:y1].copy(), self.trace_field.rows(y0, y1)
+
+    def begin(self, tick: int, pollution: float) -> dict:
+        self.tick = tick
+        self.tick_stats = self._make_empty_tick_stats()
+        self.pollution = pollution
+
+        self.trace_field.advance()
+        self.spatial.retune()
+        for organism in self.population.advance_metabolism(pollution, self.streams, tick):
+            self.spatial.remove(organism)
+
+        halo = self.halo
+        self.boundaries = {
+            UP: (self.y0, min(self.y1, self.y0 + halo)),
+            DOWN: (max(self.y0, self.y1 - halo), self.y1),
+        }
+        return {side: self._boundary(y0, y1) for side, (y0, y1) in self.boundaries.items()}
+
+    def _install(self, side: str, boundary) -> None:
+        organisms, y0, food, trace = boundary
+        y1 = y0 + len(food)
+        self.food_grid[y0:y1] = food
+        self.installed[side] = (y0, food.copy())
+        self.claims[side] = []
+        self.trace_field.replace_rows(y0, y1, trace)
+
+        for x, y, species_id in organisms:
+            ghost = self.population.spawn(x, y, 1.0, GHOST_LIFESPAN, 0.0, 0.0, 0, species_id, [])
+            self.spatial.add(ghost)
+            self.ghosts.append(ghost)
+
+    def exchange(self, from_up, from_down) -> dict:
+        acting = list(self.population)
+
+        if from_up is not None:
+            self._install(UP, from_up)
+        if from_down is not None:
+            self._install(DOWN, from_down)
+
+        new_offspring = []
+        context = vm.ExecutionContext(
+            self.settings,
+            self.streams,
+            self.tick,
+            self.food_grid,
+            self.spatial,
+            self.trace_field,
+            new_offspring,
+            self.tick_stats,
+        )
+        near_up = self.y0 + self.reach
+        near_down = self.y1 - self.reach
+        for organism in acting:
+            eaten = context.food_eaten
+            near = organism.y < near_up or organism.y >= near_down
+            vm.execute(organism, context)
+            if near and context.food_eaten != eaten:
+                self._claim(organism)
+        self._count_births(new_offspring)
+
+        for ghost in self.ghosts:
+            self.spatial.remove(ghost)
+            self.population.release(ghost.slot)
+        self.ghosts = []
+
+        # Strips are at least max_displacement rows high, so an organism
+        # that left the strip is on one of the neighbours.
+        outgoing = {UP: ([], None, None, []), DOWN: ([], None, None, [])}
+        for organism in self.population:
+            if self.y0 <= organism.y < self.y1:
+                continue
+            side = UP if organism.y < self.y0 else DOWN
+            outgoing[side][0].append(self.population.export_state(organism.slot))
+            self.spatial.remove(organism)
+            self.population.release(organism.slot)
+
+        for side, claims in self.claims.items():
+            y0, y1 = self.boundaries[side]
+            rows = (y0, self.food_grid[y0:y1].copy())
+            outgoing[side] = (outgoing[side][0], claims, rows, outgoing[side][3])
+        self.installed = {}
+
+        for x, y, amount in self.trace_field.outgoing:
+            outgoing[UP if y < self.y0 else DOWN][3].append((x, y, amount))
+        self.trace_field.outgoing = []
+
+        return outgoing
+
+    def _claim(self, organism) -> None:
+        # Records what the organism just ate from the neighbours' rows.
+        for side, (y0, seen) in self.installed.items():
+            rows = self.food_grid[y0:y0 + len(seen)]
+            for dy, x in zip(*np.nonzero(rows != seen)):
+                amount = int(seen[dy, x]) - int(rows[dy, x])
+                self.claims[side].append((organism.organism_id, int(x), y0 + int(dy), amount))
+                seen[dy, x] = rows[dy, x]
+
+    def _settle(self, claims: list, food, y0: int) -> None:
+        # Grants the claims in order from food, whose row 0 is row y0, and
+        # charges the refused part back to the claimants held here.
+        refused = {}
+        for organism_id, x, y, amount in claims:
+            granted = min(amount, int(food[y - y0, x]))
+            food[y - y0, x] -= granted
+            if granted < amount:
+                refused[organism_id] = refused.get(organism_id, 0) + amount - granted
+        if not refused:
+            return
+        factor = self.settings.food_to_energy_factor
+        for organism in self.population:
+            amount = refused.get(organism.organism_id)
+            if amount is not None:
+                organism.energy -= amount * factor
+
+    def _receive(self, side: str, incoming) -> None:
+        arrivals, claims, rows, deposits = incoming
+        for state in arrivals:
+            self.spatial.add(self.population.import_state(state))
+        if claims:
+            self._settle(claims, self.food_grid, 0)
+        if self.claims.get(side):
+            y0, food = rows
+            self._settle(self.claims[side], food, y0)
+        for x, y, amount in deposits:
+            self.trace_field.deposit(x, y, amount)
+
+    def finish(self, from_up, from_down) -> dict:
+        # Neighbours are merged in a fixed order, upper one first, so the
+        # result does not depend on which worker answered first.
+        if from_up is not None:
+            self._receive(UP, from_up)
+        if from_down is not None:
+            self._receive(DOWN, from_down)
+        self.claims = {}
+        self.trace_field.outgoing = []
+
+        self._apply_predation(self.spatial)
+        self._count_deaths(self.population.cull())
+
+        _regenerate_cells(
+            self.streams.numpy_generator(self.tick, self.index, FOOD),
+            self.food_grid[self.y0:self.y1].reshape(-1),
+            self.settings,
+            *_regeneration_probabilities(self.settings, self.pollution),
+        )
+        return self.partial_stats()
+
+    def partial_stats(self) -> dict:
+        return {
+            "count": len(self.population),
+            "totals": {
+                species_id: self.population.species_totals(species_id)
+                for species_id in (config.SPECIES_A, config.SPECIES_B)
+            },
+            "food": int(self.food_grid[self.y0:self.y1].sum(dtype="int64")),
+            "tick_stats": self.tick_stats,
+        }
+
+
+def _run_strip_worker(
+    connection,
+    settings: Settings,
+    index: int,
+    strips: int,
+    seed: int,
+    process_config: dict,
+) -> None:
+    # Applies the parent's config, which a spawned process would not
+    # inherit, then serves calls until told to stop.
+    for name, value in process_config.items():
+        setattr(config, name, value)
+
+    strip = StripSimulator(settings, index, strips, seed)
+    try:
+        while True:
+            method, args = connection.recv()
+            if method == "stop":
+                break
+            if method == "reset":
+                strip.reset()
+                connection.send(strip.partial_stats())
+            else:
+                connection.send(getattr(strip, method)(*args))
+    finally:
+        connection.close()
+
+
+def _merge_tick_stats(parts: list) -> dict:
+    merged = {}
+    for part in parts:
+        for name, value in part.items():
+            if isinstance(value, dict):
+                counts = merged.setdefault(name, {})
+                for key, count in value.items():
+                    counts[key] = counts.get(key, 0) + count
+            else:
+                merged[name] = merged.get(name, 0) + value
+    return merged
+
+
+def _merge_totals(parts: list, species_id: int) -> tuple:
+    count, age, energy, metabolism = 0, 0, 0.0, 0.0
+    for part in parts:
+        c, a, e, m = part["totals"][species_id]
+        count += c
+        age += a
+        energy += e
+        metabolism += m
+    return count, age, energy, metabolism
+
+
+class TiledSimulator:
+    # Runs one world as `strips` horizontal strips, each stepped by its own
+    # worker process, and merges their stats into one StatsSnapshot per tick.
+    # Organisms draw from the same per-organism streams as they would in a
+    # GenesisSimulator, but initial placement and food are drawn per strip,
+    # so a run is reproducible for a given seed and strip count without
+    # matching a GenesisSimulator run of the same seed.  Predators move at
+    # most predator_max_step cells per instruction, DEFAULT_PREDATOR_MAX_STEP
+    # unless the settings set one, which keeps everything an organism can
+    # reach in one tick inside its strip and the halo rows.
+    def __init__(self, strips: int | None = None, settings: Settings | None = None) -> None:
+        if strips is None:
+            strips = config.TILED_STRIPS
+        if settings is None:
+            settings = Settings.from_config()
+        settings = tiled_settings(settings, warn=True)
+        # Strips at least twice the reach of an organism keep the cells the
+        # neighbours above and below can claim apart.
+        rows = max(halo_rows(settings), 2 * max_displacement(settings))
+        if settings.world_height // strips < rows:
+            raise ValueError(
+                f"{strips} strips of a {settings.world_height} row world are thinner "
+                f"than the {rows} rows organisms can reach from both sides in one tick"
+            )
+        self.settings = settings
+        self.strips = strips
+        self.stats = StatsCollector()
+        self.tick = 0
+        self.running = False
+        self.living = 0
+        self.food_total = 0
+        self.pollution = 0.0
+        self.connections = []
+        self.workers = []
+
+    def _start_workers(self, seed: int) -> None:
+        process_config = {name: value for name, value in vars(config).items() if name.isupper()}
+        for index in range(self.strips):
+            parent, child = Pipe()
+            worker = Process(
+                target=_run_strip_worker,
+                args=(child, self.settings, index, self.strips, seed, process_config),
+            )
+            worker.start()
+            child.close()
+            self.connections.append(parent)
+            self.workers.append(worker)
+
+    def _call(self, method: str, args_per_worker: list) -> list:
+        # Sends to every worker before waiting on any, so they run in
+        # parallel, and collects the answers in strip order.
+        for connection, args in zip(self.connections, args_per_worker):
+            connection.send((method, args))
+        return [connection.recv() for connection in self.connections]
+
+    def _neighbours(self, results: list, key_from_up: str, key_from_down: str) -> list:
+        # For each strip, what the strip above sent downwards and what the
+        # strip below sent upwards.
+        last = self.strips - 1
+        return [
+            (
+                results[i - 1][key_from_up] if i > 0 else None,
+                results[i + 1][key_from_down] if i < last else None,
+            )
+            for i in range(self.strips)
+        ]
+
+    def reset(self, seed: int | None = None) -> None:
+        self.close()
+        # Without a seed one is drawn from the random module, so
+        # random.seed() still controls a whole run.
+        if seed is None:
+            seed = random.getrandbits(64)
+        self._start_workers(seed)
+
+        parts = self._call("reset", [()] * self.strips)
+        self.tick = 0
+        self.running = True
+        self.living = sum(part["count"] for part in parts)
+        self.food_total = sum(part["food"] for part in parts)
+        self.pollution = 0.0
+        self.stats.reset()
+
+    def step(self) -> None:
+        if not self.running:
+            return
+
+        self.tick += 1
+        self.pollution = next_pollution_level(self.settings, self.pollution, self.living)
+
+        boundaries = self._call("begin", [(self.tick, self.pollution)] * self.strips)
+        moved = self._call("exchange", self._neighbours(boundaries, DOWN, UP))
+        parts = self._call("finish", self._neighbours(moved, DOWN, UP))
+
+        self.living = sum(part["count"] for part in parts)
+        self.food_total = sum(part["food"] for part in parts)
+
+        if self.tick % self.stats.capture_stride == 0:
+            self.stats.record(
+                self.tick,
+                self.living,
+                _merge_totals(parts, config.SPECIES_A),
+                _merge_totals(parts, config.SPECIES_B),
+                self.food_total,
+                self.pollution,
+                _merge_tick_stats([part["tick_stats"] for part in parts]),
+            )
+
+        if not self.living:
+            self.running = False
+
+    def is_extinct(self) -> bool:
+        return self.living == 0
+
+    def close(self) -> None:
+        for connection in self.connections:
+            try:
+                connection.send(("stop", ()))
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in self.workers:
+            worker.join(timeout=5)
+        for connection in self.connections:
+            connection.close()
+        self.connections = []
+        self.workers = []
\ No newline at end of file
@@ -0,0 +1,77 @@
+import time
+from dataclasses import dataclass, fields
+
+import config
+from core.history import ColumnarHistory
+
+
+@dataclass
+class PhaseTimings:
+    tick: int
+    pollution_ns: int
+    trace_ns: int
+    spatial_ns: int
+    metabolism_ns: int
+    vm_ns: int
+    offspring_ns: int
+    predation_ns: int
+    cull_ns: int
+    food_ns: int
+    stats_ns: int
+    total_ns: int
+
+
+PHASES = [
+    field.name[:-3] for field in fields(PhaseTimings)
+    if field.name not in ("tick", "total_ns")
+]
+
+
+class PhaseTimer:
+    # Splits each tick of GenesisSimulator.step into phases.  step calls
+    # start once, then mark(phase) at the end of every phase, charging the
+    # time since the previous mark to that phase; a phase marked twice in one
+    # tick accumulates.
+    def __init__(self, history_limit: int | None = None) -> None:
+        if history_limit is None:
+            history_limit = config.STATS_HISTORY_LIMIT
+        self.history = ColumnarHistory(PhaseTimings, history_limit)
+        self.current = dict.fromkeys(PHASES, 0)
+        self.tick = 0
+        self.started = 0
+        self.last = 0
+
+    def reset(self) -> None:
+        self.history.clear()
+
+    def start(self, tick: int) -> None:
+        self.tick = tick
+        for phase in self.current:
+            self.current[phase] = 0
+        self.started = self.last = time.perf_counter_ns()
+
+    def mark(self, phase: str) -> None:
+        now = time.perf_counter_ns()
+        self.current[phase] += now - self.last
+        self.last = now
+
+    def finish(self) -> None:
+        self.history.append(PhaseTimings(
+            tick=self.tick,
+            total_ns=self.last - self.started,
+            **{f"{phase}_ns": value for phase, value in self.current.items()},
+        ))
+
+    def mean_ns(self) -> dict[str, float]:
+        # Mean time per tick spent in each phase over the kept history.
+        ticks = len(self.history)
+        if not ticks:
+            return {}
+        means = {}
+        for name in self.history.names[1:]:
+            values = self.history.column(name)
+            means[name] = sum(values) / ticks
+        return means
+
+    def export_csv(self, path) -> None:
+        self.history.write_csv(path)
\ No newline at end of file
@@ -0,0 +1,50 @@
+class TraceField:
+    PRUNE_INTERVAL = 64
+
+    def __init__(self, decay: float) -> None:
+        self.decay = decay
+        self.cutoff = 0.001
+        self.tick = 0
+        self.cells: dict[tuple[int, int], tuple[float, int]] = {}
+
+    def reset(self) -> None:
+        self.tick = 0
+        self.cells.clear()
+
+    def advance(self) -> None:
+        self.tick += 1
+        if self.tick % self.PRUNE_INTERVAL == 0:
+            self.prune()
+
+    def _decayed(self, value: float, stamp: int) -> float:
+        # Values only shrink, so checking the cutoff once after the whole
+        # elapsed decay matches zeroing the cell on the first tick it dropped
+        # below the cutoff.
+        if stamp != self.tick:
+            value *= self.decay ** (self.tick - stamp)
+        return value if value >= self.cutoff else 0.0
+
+    def get(self, x: int, y: int) -> float:
+        key = (x, y)
+        entry = self.cells.get(key)
+        if entry is None:
+            return 0.0
+
+        value = self._decayed(*entry)
+        if value == 0.0:
+            del self.cells[key]
+        return value
+
+    def deposit(self, x: int, y: int, amount: float) -> None:
+        self.cells[(x, y)] = (self.get(x, y) + amount, self.tick)
+
+    def prune(self) -> None:
+        expired = [
+            key for key, entry in self.cells.items()
+            if self._decayed(*entry) == 0.0
+        ]
+        for key in expired:
+            del self.cells[key]
+
+    def __len__(self) -> int:
+        return len(self.cells)
\ No newline at end of file
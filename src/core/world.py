@@ -1,49 +1,462 @@
-import random
-import config
+from array import array
 
+from core.rng import FOOD, WORLD
+from core.sampling import sample_indices, sample_indices_array
 
-def create_initial_food_grid():
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+FOOD_DTYPE = "uint8"
+
+
+def _check_backend(backend: str) -> None:
+    if backend != "list" and np is None:
+        raise RuntimeError(f"grid_backend = {backend!r} requires numpy to be installed")
+
+
+def is_array_grid(grid) -> bool:
+    return np is not None and isinstance(grid, np.ndarray)
+
+
+def _initial_food(rng, shape):
+    amounts = rng.integers(1, 5, size=shape, dtype=FOOD_DTYPE)
+    seeded = rng.random(shape, dtype="float32") < 0.5
+    return np.where(seeded, amounts, 0).astype(FOOD_DTYPE)
+
+
+def create_initial_food_grid(settings, streams):
+    # The grid draws from the simulator's WORLD / FOOD streams: tick 0 for
+    # the initial food, and each later tick for that tick's regeneration.
+    backend = settings.grid_backend
+    _check_backend(backend)
+
+    if backend == "chunked":
+        return ChunkedFoodGrid(
+            settings.world_width,
+            settings.world_height,
+            settings.chunk_size,
+            streams.key(0, WORLD, FOOD),
+            settings,
+        )
+
+    if backend == "numpy":
+        rng = streams.numpy_generator(0, WORLD, FOOD)
+        return _initial_food(rng, (settings.world_height, settings.world_width))
+
+    rng = streams.stream(0, WORLD, FOOD)
     return [
         [
-            random.randint(1, 4) if random.random() < 0.5 else 0
-            for _ in range(config.WORLD_WIDTH)
+            rng.randint(1, 4) if rng.random() < 0.5 else 0
+            for _ in range(settings.world_width)
         ]
-        for _ in range(config.WORLD_HEIGHT)
+        for _ in range(settings.world_height)
     ]
 
 
-def regenerate_food(food_grid) -> None:
-    pollution_factor = max(0.0, 1.0 - config.global_pollution_level)
+def _regeneration_probabilities(settings, pollution: float) -> tuple[float, float, float]:
+    pollution_factor = max(0.0, 1.0 - pollution)
+    return (
+        settings.food_regen_probability * pollution_factor,
+        settings.food_decay_probability,
+        0.001 * pollution_factor,
+    )
+
+
+def _regenerate_cells(rng, cells, settings, regen_p: float, decay_p: float, reseed_p: float) -> int:
+    # One tick of regrowth, decay and reseeding over a flat array of cells,
+    # returning the net change in food.
+    area = cells.size
+    max_food = settings.max_food_units
+
+    regen_idx = sample_indices_array(rng, area, regen_p)
+    decay_idx = sample_indices_array(rng, area, decay_p)
+
+    touched = np.union1d(regen_idx, decay_idx)
+    before = int(cells[touched].sum(dtype="int64"))
+
+    regen_amount = cells[regen_idx].astype("int16")
+    decay_amount = cells[decay_idx].astype("int16")
+
+    regen_mask = (regen_amount > 0) & (regen_amount < max_food)
+    cells[regen_idx[regen_mask]] = np.minimum(
+        max_food,
+        regen_amount[regen_mask] + settings.food_regen_increment,
+    )
+
+    decay_mask = decay_amount > 0
+    cells[decay_idx[decay_mask]] = np.maximum(
+        0,
+        decay_amount[decay_mask] - settings.food_decay_decrement,
+    )
+
+    changed = int(cells[touched].sum(dtype="int64")) - before
+
+    reseed_idx = sample_indices_array(rng, area, reseed_p)
+    reseeded = reseed_idx[cells[reseed_idx] == 0]
+    cells[reseeded] = 1
+
+    return changed + int(reseeded.size)
+
+
+def regenerate_food_stack(food, settings, rows: list[int], pollutions, generators) -> list[int]:
+    # _regenerate_cells for the grids food[rows[i]] of a stacked (worlds,
+    # height, width) array, each at pollutions[i] and drawing from
+    # generators[i].  Indices are sampled world by world, exactly as
+    # _regenerate_cells samples them, and the updates run as one pass over
+    # the whole stack.  Returns the net change in food of each row.
+    area = food[0].size
+    cells = food.reshape(-1)
+    regen, decay, reseed = [], [], []
+
+    for row, pollution, rng in zip(rows, pollutions, generators):
+        regen_p, decay_p, reseed_p = _regeneration_probabilities(settings, pollution)
+        offset = row * area
+        regen.append(sample_indices_array(rng, area, regen_p) + offset)
+        decay.append(sample_indices_array(rng, area, decay_p) + offset)
+        reseed.append(sample_indices_array(rng, area, reseed_p) + offset)
+
+    regen_idx = np.concatenate(regen)
+    decay_idx = np.concatenate(decay)
+    reseed_idx = np.concatenate(reseed)
+    max_food = settings.max_food_units
+
+    touched = np.union1d(regen_idx, decay_idx)
+    before = cells[touched].astype("int64")
+
+    regen_amount = cells[regen_idx].astype("int16")
+    decay_amount = cells[decay_idx].astype("int16")
+
+    regen_mask = (regen_amount > 0) & (regen_amount < max_food)
+    cells[regen_idx[regen_mask]] = np.minimum(
+        max_food,
+        regen_amount[regen_mask] + settings.food_regen_increment,
+    )
+
+    decay_mask = decay_amount > 0
+    cells[decay_idx[decay_mask]] = np.maximum(
+        0,
+        decay_amount[decay_mask] - settings.food_decay_decrement,
+    )
+
+    worlds = len(food)
+    changed = np.bincount(touched // area, weights=cells[touched] - before, minlength=worlds)
+
+    reseeded = reseed_idx[cells[reseed_idx] == 0]
+    cells[reseeded] = 1
+    changed += np.bincount(reseeded // area, minlength=worlds)
+
+    return [int(changed[row]) for row in rows]
+
+
+def _transition_matrix(settings, states: int, regen_p: float, decay_p: float, reseed_p: float):
+    # The matrix whose row a is the distribution of a cell's food after one
+    # tick given a before it, as _regenerate_cells applies the tick to every
+    # cell independently.
+    max_food = settings.max_food_units
+    amounts = np.arange(states)
+    decayed = np.where(amounts > 0, np.maximum(0, amounts - settings.food_decay_decrement), amounts)
+    grown = np.where(
+        (amounts > 0) & (amounts < max_food),
+        np.minimum(max_food, amounts + settings.food_regen_increment),
+        amounts,
+    )
+
+    # Decay wins when both fire, so regrowth only counts without decay.
+    matrix = np.zeros((states, states))
+    matrix[amounts, decayed] += decay_p
+    matrix[amounts, grown] += (1.0 - decay_p) * regen_p
+    matrix[amounts, amounts] += (1.0 - decay_p) * (1.0 - regen_p)
+
+    # Reseeding turns some of the cells left empty into one unit of food.
+    empty = matrix[:, 0].copy()
+    matrix[:, 0] = empty * (1.0 - reseed_p)
+    matrix[:, 1] += empty * reseed_p
+    return matrix
 
-    for y in range(config.WORLD_HEIGHT):
-        for x in range(config.WORLD_WIDTH):
-            amount = food_grid[y][x]
 
-            if 0 < amount < config.MAX_FOOD_UNITS:
-                if random.random() < config.FOOD_REGEN_PROBABILITY * pollution_factor:
-                    food_grid[y][x] = min(
-                        config.MAX_FOOD_UNITS,
-                        amount + config.FOOD_REGEN_INCREMENT,
+def _regenerate_cells_with(rng, cells, transition) -> int:
+    # Several ticks of _regenerate_cells at once from the product of their
+    # transition matrices: every cell draws its amount after the last tick
+    # from its row of the product, which has the same distribution as
+    # replaying the ticks one by one.  Returns the net change in food.
+    cumulative = transition.cumsum(axis=1)
+    cumulative[:, -1] = 1.0
+    before = int(cells.sum(dtype="int64"))
+    draws = rng.random(cells.size)
+    cells[:] = (draws[:, None] >= cumulative[cells]).sum(axis=1)
+    return int(cells.sum(dtype="int64")) - before
+
+
+class ChunkedFoodGrid:
+    # The food grid as square tiles of `tile_size` cells that only exist
+    # once something reads or writes them, for worlds far larger than the
+    # area the organisms actually visit.
+    #
+    # A tile is generated from its own generator, seeded from the grid seed
+    # and the tile coordinates, and regenerates from that generator too.
+    # Regeneration is not applied to every tile each tick: a tile catches up
+    # on the ticks it missed the next time it is touched.  Up to REPLAY_TICKS
+    # missed ticks are replayed one by one from the probabilities of the
+    # last REPLAY_TICKS ticks; longer gaps are applied in a single draw per
+    # cell from the combined transition of the whole gap, with the same
+    # distribution.  advance() keeps that combined transition up to date for
+    # every tick some tile is still waiting from, tiles never generated
+    # waiting from tick 0, so memory and catch up cost follow the number of
+    # tiles rather than the number of ticks.
+    #
+    # total is an estimate: exact for the tiles as they were when last
+    # touched, it counts every tile that was never generated at its expected
+    # initial amount and leaves out the regeneration tiles have not caught
+    # up on yet.
+    EXPECTED_FOOD_NUMERATOR = 5  # half the cells hold 1..4 food, 5 / 4 per cell
+    EXPECTED_FOOD_DENOMINATOR = 4
+    INITIAL_FOOD_MAX = 4
+    REPLAY_TICKS = 8
+
+    def __init__(self, width: int, height: int, tile_size: int, seed: int, settings) -> None:
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.seed = seed
+        self.settings = settings
+        self.states = max(settings.max_food_units, self.INITIAL_FOOD_MAX) + 1
+        self.tiles = {}
+        self.rngs = {}
+        self.applied = {}
+        self.tick = 0
+        self.regen_p = array("d")
+        self.decay_p = array("d")
+        self.reseed_p = array("d")
+        self.pending = 0
+
+        self.total = 0
+        tiles = 0
+        for tile_height in self._tile_lengths(height):
+            for tile_width in self._tile_lengths(width):
+                self.total += self._expected_total(tile_width * tile_height)
+                tiles += 1
+
+        # The number of tiles last caught up at each tick and the combined
+        # transition of the ticks since.
+        self.waiting = {0: tiles}
+        self.products = {0: np.eye(self.states)}
+
+    def _tile_lengths(self, length: int) -> list[int]:
+        size = self.tile_size
+        return [min(size, length - start) for start in range(0, length, size)]
+
+    def _expected_total(self, area: int) -> int:
+        return area * self.EXPECTED_FOOD_NUMERATOR // self.EXPECTED_FOOD_DENOMINATOR
+
+    @property
+    def tile_count(self) -> int:
+        return len(self.tiles)
+
+    def _create_tile(self, key):
+        tx, ty = key
+        size = self.tile_size
+        shape = (
+            min(size, self.height - ty * size),
+            min(size, self.width - tx * size),
+        )
+        rng = np.random.default_rng([self.seed, tx, ty])
+        tile = _initial_food(rng, shape)
+
+        self.tiles[key] = tile
+        self.rngs[key] = rng
+        self.applied[key] = 0
+
+        change = int(tile.sum(dtype="int64")) - self._expected_total(tile.size)
+        self.total += change
+        self.pending += change
+        return tile
+
+    def _tile(self, tx: int, ty: int):
+        key = (tx, ty)
+        tile = self.tiles.get(key)
+        if tile is None:
+            tile = self._create_tile(key)
+
+        applied = self.applied[key]
+        tick = self.tick
+        if applied < tick:
+            rng = self.rngs[key]
+            cells = tile.reshape(-1)
+            settings = self.settings
+            change = 0
+            if tick - applied > self.REPLAY_TICKS:
+                change += _regenerate_cells_with(rng, cells, self.products[applied])
+            else:
+                recent = len(self.regen_p)
+                for index in range(recent - (tick - applied), recent):
+                    change += _regenerate_cells(
+                        rng,
+                        cells,
+                        settings,
+                        self.regen_p[index],
+                        self.decay_p[index],
+                        self.reseed_p[index],
                     )
+            self.applied[key] = tick
+            self._wait(applied, tick)
+            self.total += change
+            self.pending += change
+        return tile
 
-            if amount > 0 and random.random() < config.FOOD_DECAY_PROBABILITY:
-                new_amount = amount - config.FOOD_DECAY_DECREMENT
-                food_grid[y][x] = max(0, new_amount)
+    def _wait(self, applied: int, tick: int) -> None:
+        # Moves a tile caught up at `applied` to waiting from `tick`.
+        self.waiting[applied] -= 1
+        if not self.waiting[applied]:
+            del self.waiting[applied]
+            del self.products[applied]
+        if tick in self.waiting:
+            self.waiting[tick] += 1
+        else:
+            self.waiting[tick] = 1
+            self.products[tick] = np.eye(self.states)
 
-            if food_grid[y][x] == 0 and random.random() < 0.001 * pollution_factor:
-                food_grid[y][x] = 1
+    def get(self, x: int, y: int) -> int:
+        size = self.tile_size
+        return int(self._tile(x // size, y // size)[y % size, x % size])
 
+    def take(self, x: int, y: int, amount: int) -> None:
+        size = self.tile_size
+        self._tile(x // size, y // size)[y % size, x % size] -= amount
+        self.total -= amount
 
-def create_trace_grid():
-    return [
-        [0.0 for _ in range(config.WORLD_WIDTH)]
-        for _ in range(config.WORLD_HEIGHT)
-    ]
+    def window(self, x0: int, y0: int, x1: int, y1: int):
+        # The cells of the inclusive rectangle as an array, gathered from
+        # every tile it overlaps.
+        size = self.tile_size
+        tx0, tx1 = x0 // size, x1 // size
+        ty0, ty1 = y0 // size, y1 // size
+        if tx0 == tx1 and ty0 == ty1:
+            return self._tile(tx0, ty0)[y0 - ty0 * size:y1 - ty0 * size + 1, x0 - tx0 * size:x1 - tx0 * size + 1]
+
+        cells = np.empty((y1 - y0 + 1, x1 - x0 + 1), dtype=FOOD_DTYPE)
+        for ty in range(ty0, ty1 + 1):
+            top = max(y0, ty * size)
+            bottom = min(y1, ty * size + size - 1)
+            for tx in range(tx0, tx1 + 1):
+                left = max(x0, tx * size)
+                right = min(x1, tx * size + size - 1)
+                cells[top - y0:bottom - y0 + 1, left - x0:right - x0 + 1] = self._tile(tx, ty)[
+                    top - ty * size:bottom - ty * size + 1,
+                    left - tx * size:right - tx * size + 1,
+                ]
+        return cells
+
+    def advance(self, regen_p: float, decay_p: float, reseed_p: float) -> int:
+        # Records one tick of regeneration and returns the change in total
+        # from the tiles generated or caught up since the previous call.
+        self.regen_p.append(regen_p)
+        self.decay_p.append(decay_p)
+        self.reseed_p.append(reseed_p)
+        if len(self.regen_p) > self.REPLAY_TICKS:
+            del self.regen_p[0]
+            del self.decay_p[0]
+            del self.reseed_p[0]
+
+        transition = _transition_matrix(self.settings, self.states, regen_p, decay_p, reseed_p)
+        products = np.stack(list(self.products.values())) @ transition
+        self.products = dict(zip(self.products, products))
+        self.tick += 1
+
+        change = self.pending
+        self.pending = 0
+        return change
+
+    def to_array(self):
+        # The whole grid as one dense array.  This generates every tile, so
+        # it is only meant for worlds small enough to draw.
+        return self.window(0, 0, self.width - 1, self.height - 1)
+
+
+def food_at(food_grid, x: int, y: int) -> int:
+    if isinstance(food_grid, ChunkedFoodGrid):
+        return food_grid.get(x, y)
+    return food_grid[y][x]
+
+
+def take_food(food_grid, x: int, y: int, amount: int) -> None:
+    if isinstance(food_grid, ChunkedFoodGrid):
+        food_grid.take(x, y, amount)
+    else:
+        food_grid[y][x] -= amount
+
+
+def food_window(food_grid, x0: int, y0: int, x1: int, y1: int):
+    # Rows covering the inclusive rectangle and the cell the first row and
+    # column stand for, so cell (x, y) is rows[y - top][x - left].  Plain
+    # list grids are returned whole rather than copied.
+    if isinstance(food_grid, ChunkedFoodGrid):
+        return food_grid.window(x0, y0, x1, y1).tolist(), x0, y0
+    if is_array_grid(food_grid):
+        return food_grid[y0:y1 + 1, x0:x1 + 1].tolist(), x0, y0
+    return food_grid, 0, 0
+
+
+def dense_food_grid(food_grid):
+    if isinstance(food_grid, ChunkedFoodGrid):
+        return food_grid.to_array()
+    return food_grid
+
+
+def regenerate_food(food_grid, settings, pollution: float, streams, tick: int) -> int:
+    # Returns the net change in the total amount of food on the grid.
+    probabilities = _regeneration_probabilities(settings, pollution)
+    if isinstance(food_grid, ChunkedFoodGrid):
+        return food_grid.advance(*probabilities)
+    if is_array_grid(food_grid):
+        rng = streams.numpy_generator(tick, WORLD, FOOD)
+        return _regenerate_cells(rng, food_grid.reshape(-1), settings, *probabilities)
+
+    rng = streams.stream(tick, WORLD, FOOD)
+    regen_p, decay_p, reseed_p = probabilities
+    width = settings.world_width
+    area = settings.area
+    max_food = settings.max_food_units
+    regen_increment = settings.food_regen_increment
+    decay_decrement = settings.food_decay_decrement
+
+    # Regrowth and decay are both decided on the amount a cell had at the
+    # start of the tick, and decay wins when both fire on the same cell.
+    updates = {}
+
+    for index in sample_indices(rng, area, regen_p):
+        y, x = divmod(index, width)
+        amount = food_grid[y][x]
+        if 0 < amount < max_food:
+            updates[index] = min(max_food, amount + regen_increment)
+
+    for index in sample_indices(rng, area, decay_p):
+        y, x = divmod(index, width)
+        amount = food_grid[y][x]
+        if amount > 0:
+            updates[index] = max(0, amount - decay_decrement)
+
+    delta = 0
+    for index, amount in updates.items():
+        y, x = divmod(index, width)
+        delta += amount - food_grid[y][x]
+        food_grid[y][x] = amount
+
+    for index in sample_indices(rng, area, reseed_p):
+        y, x = divmod(index, width)
+        if food_grid[y][x] == 0:
+            food_grid[y][x] = 1
+            delta += 1
+
+    return delta
 
 
-def decay_trace_grid(trace_grid) -> None:
-    for y in range(config.WORLD_HEIGHT):
-        for x in range(config.WORLD_WIDTH):
-            trace_grid[y][x] *= config.PREDATOR_TRACE_DECAY
-            if trace_grid[y][x] < 0.001:
-                trace_grid[y][x] = 0.0
\ No newline at end of file
+def food_total(food_grid) -> int:
+    # Only an estimate for a ChunkedFoodGrid, see ChunkedFoodGrid.total.
+    if isinstance(food_grid, ChunkedFoodGrid):
+        return food_grid.total
+    if is_array_grid(food_grid):
+        return int(food_grid.sum())
+    return sum(sum(row) for row in food_grid)
\ No newline at end of file
@@ -1,37 +1,47 @@
-import random
-
 import config
 from core.life import Life
+from core.trace import TraceField
+from core.world import food_at, food_window, take_food
 from genetics.genome import mutate_genome
 from genetics.spatial_index import SpatialIndex
 
 
-def _move_random(life: Life, spatial: SpatialIndex) -> None:
-    dx, dy = random.choice([
+def _move_random(life: Life, settings, rng, spatial: SpatialIndex) -> None:
+    dx, dy = rng.choice([
         (1, 0), (-1, 0),
         (0, 1), (0, -1),
         (0, 0),
     ])
     old_x, old_y = life.x, life.y
-    nx = max(0, min(config.WORLD_WIDTH - 1, life.x + dx))
-    ny = max(0, min(config.WORLD_HEIGHT - 1, life.y + dy))
+    nx = max(0, min(settings.max_x, life.x + dx))
+    ny = max(0, min(settings.max_y, life.y + dy))
     life.x, life.y = nx, ny
     spatial.move(life, old_x, old_y, nx, ny)
 
 
-def _move_to_food(life: Life, food_grid, spatial: SpatialIndex) -> None:
+def _move_to_food(life: Life, settings, rng, food_grid, spatial: SpatialIndex) -> None:
     if life.species_id != config.SPECIES_A:
         return
 
     vision_range = 2
     best_score = -1e9
     best_positions = []
+    max_x = settings.max_x
+    max_y = settings.max_y
+
+    rows, x0, y0 = food_window(
+        food_grid,
+        max(0, life.x - vision_range),
+        max(0, life.y - vision_range),
+        min(max_x, life.x + vision_range),
+        min(max_y, life.y + vision_range),
+    )
 
     for dx in range(-vision_range, vision_range + 1):
         for dy in range(-vision_range, vision_range + 1):
-            nx = max(0, min(config.WORLD_WIDTH - 1, life.x + dx))
-            ny = max(0, min(config.WORLD_HEIGHT - 1, life.y + dy))
-            score = food_grid[ny][nx]
+            nx = max(0, min(max_x, life.x + dx))
+            ny = max(0, min(max_y, life.y + dy))
+            score = rows[ny - y0][nx - x0]
 
             if score > best_score:
                 best_score = score
@@ -41,7 +51,7 @@ def _move_to_food(life: Life, food_grid, spatial: SpatialIndex) -> None:
 
     if best_positions:
         old_x, old_y = life.x, life.y
-        nx, ny = random.choice(best_positions)
+        nx, ny = rng.choice(best_positions)
         life.x, life.y = nx, ny
         spatial.move(life, old_x, old_y, nx, ny)
 
@@ -50,14 +60,18 @@ def _predator_candidate_moves():
     return [(1, 0), (-1, 0), (0, 1), (0, -1), (0, 0)]
 
 
-def _bounded_step(x: int, y: int, dx: int, dy: int) -> tuple[int, int]:
-    nx = max(0, min(config.WORLD_WIDTH - 1, x + dx))
-    ny = max(0, min(config.WORLD_HEIGHT - 1, y + dy))
+def _bounded_step(settings, x: int, y: int, dx: int, dy: int) -> tuple[int, int]:
+    nx = max(0, min(settings.max_x, x + dx))
+    ny = max(0, min(settings.max_y, y + dy))
     return nx, ny
 
 
-def _local_prey_score(spatial: SpatialIndex, x: int, y: int) -> float:
-    vision_range = config.PREDATOR_SEARCH_RADIUS
+def _local_prey_score(settings, spatial: SpatialIndex, x: int, y: int) -> float:
+    if spatial.prey_field is not None:
+        return spatial.prey_field.score(x, y)
+
+    vision_range = settings.predator_search_radius
+    prey_weight = settings.predator_prey_weight
 
     bx0 = max(0, (x - vision_range) // spatial.bucket_size)
     bx1 = (x + vision_range) // spatial.bucket_size
@@ -68,10 +82,7 @@ def _local_prey_score(spatial: SpatialIndex, x: int, y: int) -> float:
 
     for by in range(by0, by1 + 1):
         for bx in range(bx0, bx1 + 1):
-            for prey in spatial.prey_buckets.get((bx, by), []):
-                if prey.is_dead():
-                    continue
-
+            for prey in spatial.prey_buckets.get((bx, by), ()):
                 dx = abs(prey.x - x)
                 dy = abs(prey.y - y)
 
@@ -83,30 +94,36 @@ def _local_prey_score(spatial: SpatialIndex, x: int, y: int) -> float:
                 if dist == 0:
                     return 100.0
 
-                score = config.PREDATOR_PREY_WEIGHT / (dist + 1.0)
+                score = prey_weight / (dist + 1.0)
                 if score > best_score:
                     best_score = score
 
     return best_score
 
 
-def _score_predator_cell(life: Life, spatial: SpatialIndex, trace_grid, nx: int, ny: int) -> float:
-    score = _local_prey_score(spatial, nx, ny)
+def _score_predator_cell(
+    life: Life,
+    settings,
+    rng,
+    spatial: SpatialIndex,
+    trace_field: TraceField,
+    nx: int,
+    ny: int,
+) -> float:
+    score = _local_prey_score(settings, spatial, nx, ny)
 
-    score += trace_grid[ny][nx] * config.PREDATOR_TRACE_BONUS
+    score += trace_field.get(nx, ny) * settings.predator_trace_bonus
 
     if (nx, ny) == (life.last_x, life.last_y):
-        score -= config.PREDATOR_REVISIT_PENALTY
+        score -= settings.predator_revisit_penalty
 
-    score += random.uniform(
-        -config.PREDATOR_RANDOM_NOISE,
-        config.PREDATOR_RANDOM_NOISE,
-    )
+    noise = settings.predator_random_noise
+    score += rng.uniform(-noise, noise)
 
     return score
 
 
-def _move_towards_prey(life: Life, spatial: SpatialIndex, trace_grid) -> None:
+def _move_towards_prey(life: Life, settings, rng, spatial: SpatialIndex, trace_field: TraceField) -> None:
     if life.species_id != config.SPECIES_B:
         return
 
@@ -114,28 +131,33 @@ def _move_towards_prey(life: Life, spatial: SpatialIndex, trace_grid) -> None:
     dy = int(round(life.registers[1]))
 
     if dx == 0 and dy == 0 and life.current_search_score >= 50.0:
-        trace_grid[life.y][life.x] += config.PREDATOR_TRACE_DEPOSIT
+        trace_field.deposit(life.x, life.y, settings.predator_trace_deposit)
         life.last_search_score = life.current_search_score
         return
 
     if life.current_search_score > life.last_search_score:
-        life.run_ticks_left = min(life.run_ticks_left + config.PREDATOR_RUN_BONUS, 4)
+        life.run_ticks_left = min(life.run_ticks_left + settings.predator_run_bonus, 4)
     else:
         life.run_ticks_left = max(0, life.run_ticks_left - 1)
 
-        if random.random() < config.PREDATOR_TUMBLE_PROB:
-            dx, dy = random.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
+        if rng.random() < settings.predator_tumble_prob:
+            dx, dy = rng.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
 
     if dx == 0 and dy == 0:
         dx, dy = life.heading_dx, life.heading_dy
 
     if dx == 0 and dy == 0:
-        dx, dy = random.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
+        dx, dy = rng.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
+
+    max_step = settings.predator_max_step
+    if max_step is not None:
+        dx = max(-max_step, min(max_step, dx))
+        dy = max(-max_step, min(max_step, dy))
 
     old_x, old_y = life.x, life.y
     life.last_x, life.last_y = old_x, old_y
 
-    nx, ny = _bounded_step(life.x, life.y, dx, dy)
+    nx, ny = _bounded_step(settings, life.x, life.y, dx, dy)
 
     life.x, life.y = nx, ny
     life.heading_dx, life.heading_dy = dx, dy
@@ -143,28 +165,29 @@ def _move_towards_prey(life: Life, spatial: SpatialIndex, trace_grid) -> None:
     spatial.move(life, old_x, old_y, nx, ny)
 
     if life.current_search_score > life.last_search_score:
-        trace_grid[ny][nx] += config.PREDATOR_TRACE_DEPOSIT
+        trace_field.deposit(nx, ny, settings.predator_trace_deposit)
 
     life.last_search_score = life.current_search_score
 
 
-def _eat_plant(life: Life, food_grid) -> None:
+def _eat_plant(life: Life, settings, food_grid) -> int:
     if life.species_id != config.SPECIES_A:
-        return
+        return 0
 
-    cell_amount = food_grid[life.y][life.x]
+    cell_amount = int(food_at(food_grid, life.x, life.y))
     if cell_amount <= 0:
-        return
+        return 0
 
-    consumed = min(config.FOOD_CONSUMPTION_PER_EVENT, cell_amount)
-    food_grid[life.y][life.x] -= consumed
-    life.energy += consumed * config.FOOD_TO_ENERGY_FACTOR
+    consumed = min(settings.food_consumption_per_event, cell_amount)
+    take_food(food_grid, life.x, life.y, consumed)
+    life.energy += consumed * settings.food_to_energy_factor
+    return consumed
 
 
 def _sense_food(life: Life, food_grid) -> int:
     if life.species_id != config.SPECIES_A:
         return 0
-    return 1 if food_grid[life.y][life.x] > 0 else 0
+    return 1 if food_at(food_grid, life.x, life.y) > 0 else 0
 
 
 def _sense_neighbor(life: Life, spatial: SpatialIndex) -> int:
@@ -179,35 +202,47 @@ def _sense_prey(life: Life, spatial: SpatialIndex) -> int:
     return 1 if spatial.prey_exists_in_range(life.x, life.y, vision_range) else 0
 
 
-def _sense_prey_direction(life: Life, spatial: SpatialIndex, trace_grid) -> tuple[float, float]:
+def _sense_prey_direction(
+    life: Life,
+    settings,
+    rng,
+    spatial: SpatialIndex,
+    trace_field: TraceField,
+) -> tuple[float, float]:
     if life.species_id != config.SPECIES_B:
         return 0.0, 0.0
 
-    vision_range = config.PREDATOR_SEARCH_RADIUS
+    vision_range = settings.predator_search_radius
+
+    if spatial.prey_field is not None:
+        prey_nearby = spatial.prey_field.exists(life.x, life.y)
+    else:
+        prey_nearby = spatial.prey_exists_in_range(life.x, life.y, vision_range)
 
-    if not spatial.prey_exists_in_range(life.x, life.y, vision_range):
+    if not prey_nearby:
         dx = life.heading_dx
         dy = life.heading_dy
 
         if dx == 0 and dy == 0:
-            dx, dy = random.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
+            dx, dy = rng.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
 
-        life.current_search_score = trace_grid[life.y][life.x] * config.PREDATOR_TRACE_BONUS
+        life.current_search_score = trace_field.get(life.x, life.y) * settings.predator_trace_bonus
         return float(dx), float(dy)
 
     best_score = -1e18
     best_dirs = []
 
+    heading_bonus = settings.predator_heading_bonus
     for dx, dy in _predator_candidate_moves():
-        nx, ny = _bounded_step(life.x, life.y, dx, dy)
-        score = _score_predator_cell(life, spatial, trace_grid, nx, ny)
+        nx, ny = _bounded_step(settings, life.x, life.y, dx, dy)
+        score = _score_predator_cell(life, settings, rng, spatial, trace_field, nx, ny)
 
         if (
             dx == life.heading_dx
             and dy == life.heading_dy
             and life.run_ticks_left > 0
         ):
-            score += config.PREDATOR_HEADING_BONUS
+            score += heading_bonus
 
         if score > best_score:
             best_score = score
@@ -215,21 +250,21 @@ def _sense_prey_direction(life: Life, spatial: SpatialIndex, trace_grid) -> tupl
         elif score == best_score:
             best_dirs.append((dx, dy))
 
-    chosen_dx, chosen_dy = random.choice(best_dirs)
+    chosen_dx, chosen_dy = rng.choice(best_dirs)
     life.current_search_score = best_score
 
     return float(chosen_dx), float(chosen_dy)
 
 
-def _try_reproduce(life: Life, offspring_list: list[Life], spatial: SpatialIndex) -> None:
-    params = config.SPECIES_PARAMETERS[life.species_id]
+def _try_reproduce(life: Life, settings, rng, offspring_list: list[Life], spatial: SpatialIndex) -> None:
+    params = settings.species(life.species_id)
     threshold = params["reproduction_threshold"]
     cost = params["reproduction_cost"]
     probability = params["reproduction_probability"]
 
     if life.energy < threshold:
         return
-    if random.random() > probability:
+    if rng.random() > probability:
         return
 
     life.energy -= cost
@@ -238,21 +273,22 @@ def _try_reproduce(life: Life, offspring_list: list[Life], spatial: SpatialIndex
         spatial.remove(life)
         return
 
-    dx, dy = random.choice([
+    dx, dy = rng.choice([
         (1, 0),
         (-1, 0),
         (0, 1),
         (0, -1),
         (0, 0),
     ])
-    child_x = max(0, min(config.WORLD_WIDTH - 1, life.x + dx))
-    child_y = max(0, min(config.WORLD_HEIGHT - 1, life.y + dy))
+    child_x = max(0, min(settings.max_x, life.x + dx))
+    child_y = max(0, min(settings.max_y, life.y + dy))
     species_id = life.species_id
+    mutation_probability = settings.mutation_probability
 
     mutated = False
 
-    if random.random() < config.MUTATION_PROBABILITY:
-        delta_lifespan = random.randint(-4, 4)
+    if rng.random() < mutation_probability:
+        delta_lifespan = rng.randint(-4, 4)
     else:
         delta_lifespan = 0
     if delta_lifespan != 0:
@@ -265,8 +301,8 @@ def _try_reproduce(life: Life, offspring_list: list[Life], spatial: SpatialIndex
         min(max_life, life.lifespan_ticks + delta_lifespan),
     )
 
-    if random.random() < config.MUTATION_PROBABILITY:
-        delta_metabolism = random.uniform(-0.1, 0.1)
+    if rng.random() < mutation_probability:
+        delta_metabolism = rng.uniform(-0.1, 0.1)
     else:
         delta_metabolism = 0.0
     if delta_metabolism != 0.0:
@@ -279,8 +315,8 @@ def _try_reproduce(life: Life, offspring_list: list[Life], spatial: SpatialIndex
         min(max_meta, life.metabolism_rate + delta_metabolism),
     )
 
-    if random.random() < config.MUTATION_PROBABILITY:
-        delta_mobility = random.uniform(-0.05, 0.05)
+    if rng.random() < mutation_probability:
+        delta_mobility = rng.uniform(-0.05, 0.05)
     else:
         delta_mobility = 0.0
     if delta_mobility != 0.0:
@@ -293,13 +329,17 @@ def _try_reproduce(life: Life, offspring_list: list[Life], spatial: SpatialIndex
         min(max_move, life.mobility_probability + delta_mobility),
     )
 
-    child_energy = random.randint(
+    child_energy = rng.randint(
         params["energy_min"],
         params["energy_max"],
     )
     child_generation = life.generation_index + 1
 
-    child = Life(
+    child_genome = mutate_genome(life.genome, rng=rng)
+    if child_genome != life.genome:
+        mutated = True
+
+    child = life.population.spawn(
         child_x,
         child_y,
         child_energy,
@@ -308,16 +348,9 @@ def _try_reproduce(life: Life, offspring_list: list[Life], spatial: SpatialIndex
         child_mobility,
         child_generation,
         species_id=species_id,
+        genome=child_genome,
+        organism_id=rng.next64() >> 1,
     )
-
-    child_genome = mutate_genome(life.genome)
-    if child_genome != life.genome:
-        mutated = True
-
-    child.genome = child_genome
-    child.ip = 0
-    child.registers = [0.0, 0.0, 0.0, 0.0]
-    child.memory = [0.0] * len(life.memory)
     child.was_mutated = mutated
 
     offspring_list.append(child)
@@ -0,0 +1,245 @@
+from collections import OrderedDict
+
+import config
+from core.life import MEMORY_SIZE, REGISTER_COUNT
+from genetics.opcodes import (
+    MOVE_RANDOM,
+    MOVE_TO_FOOD,
+    EAT_PLANT,
+    MOVE_TOWARDS_PREY,
+    REPRODUCE_OP,
+    SENSE_FOOD,
+    SENSE_ENERGY_LOW,
+    SENSE_NEIGHBOR,
+    SENSE_RANDOM,
+    SENSE_PREY,
+    SENSE_PREY_DIRECTION,
+    INC_R0,
+    DEC_R0,
+    COPY_R0_TO_R1,
+    LOAD_R0,
+    STORE_R0,
+    JUMP,
+    JUMP_IF_R0_ZERO,
+    JUMP_IF_R0_NZ,
+)
+from genetics.behaviors import (
+    _move_random,
+    _move_to_food,
+    _eat_plant,
+    _move_towards_prey,
+    _sense_food,
+    _sense_neighbor,
+    _sense_prey,
+    _sense_prey_direction,
+    _try_reproduce,
+)
+
+
+class CompiledProgram:
+    # handlers[ip](life, context) runs the instruction at ip and returns the
+    # next ip.  Jump targets and LOAD/STORE addresses are resolved at compile
+    # time, so executing an instruction never looks at the genome again.
+    __slots__ = ("opcodes", "handlers")
+
+    def __init__(self, opcodes: tuple[int, ...], handlers: list) -> None:
+        self.opcodes = opcodes
+        self.handlers = handlers
+
+    def __len__(self) -> int:
+        return len(self.opcodes)
+
+
+def _advance(next_ip: int):
+    def handler(life, context):
+        return next_ip
+
+    return handler
+
+
+def _compile_instruction(genome: tuple[int, ...], ip: int):
+    n = len(genome)
+    opcode = genome[ip]
+    next_ip = (ip + 1) % n
+    operand = genome[next_ip]
+    skip_ip = (ip + 2) % n
+
+    if opcode == MOVE_RANDOM:
+        def handler(life, context):
+            _move_random(life, context.settings, context.rng, context.spatial)
+            return next_ip
+
+    elif opcode == MOVE_TO_FOOD:
+        def handler(life, context):
+            _move_to_food(life, context.settings, context.rng, context.food_grid, context.spatial)
+            return next_ip
+
+    elif opcode == EAT_PLANT:
+        def handler(life, context):
+            context.food_eaten += _eat_plant(life, context.settings, context.food_grid)
+            return next_ip
+
+    elif opcode == MOVE_TOWARDS_PREY:
+        def handler(life, context):
+            _move_towards_prey(
+                life, context.settings, context.rng, context.spatial, context.trace_field
+            )
+            return next_ip
+
+    elif opcode == REPRODUCE_OP:
+        def handler(life, context):
+            _try_reproduce(
+                life, context.settings, context.rng, context.offspring_list, context.spatial
+            )
+            return next_ip
+
+    elif opcode == SENSE_FOOD:
+        def handler(life, context):
+            life.population.registers[life.slot * REGISTER_COUNT] = float(
+                _sense_food(life, context.food_grid)
+            )
+            return next_ip
+
+    elif opcode == SENSE_ENERGY_LOW:
+        threshold = 10.0
+
+        def handler(life, context):
+            life.population.registers[life.slot * REGISTER_COUNT + 1] = (
+                1.0 if life.energy < threshold else 0.0
+            )
+            return next_ip
+
+    elif opcode == SENSE_NEIGHBOR:
+        def handler(life, context):
+            life.population.registers[life.slot * REGISTER_COUNT + 2] = float(
+                _sense_neighbor(life, context.spatial)
+            )
+            return next_ip
+
+    elif opcode == SENSE_RANDOM:
+        def handler(life, context):
+            life.population.registers[life.slot * REGISTER_COUNT + 3] = float(
+                context.rng.randint(0, 1)
+            )
+            return next_ip
+
+    elif opcode == SENSE_PREY:
+        def handler(life, context):
+            life.population.registers[life.slot * REGISTER_COUNT] = float(
+                _sense_prey(life, context.spatial)
+            )
+            return next_ip
+
+    elif opcode == SENSE_PREY_DIRECTION:
+        def handler(life, context):
+            dx, dy = _sense_prey_direction(
+                life, context.settings, context.rng, context.spatial, context.trace_field
+            )
+            registers = life.population.registers
+            base = life.slot * REGISTER_COUNT
+            registers[base] = dx
+            registers[base + 1] = dy
+            return next_ip
+
+    elif opcode == INC_R0:
+        def handler(life, context):
+            life.population.registers[life.slot * REGISTER_COUNT] += 1.0
+            return next_ip
+
+    elif opcode == DEC_R0:
+        def handler(life, context):
+            life.population.registers[life.slot * REGISTER_COUNT] -= 1.0
+            return next_ip
+
+    elif opcode == COPY_R0_TO_R1:
+        def handler(life, context):
+            registers = life.population.registers
+            base = life.slot * REGISTER_COUNT
+            registers[base + 1] = registers[base]
+            return next_ip
+
+    elif opcode == LOAD_R0:
+        address = operand % MEMORY_SIZE
+
+        def handler(life, context):
+            population = life.population
+            population.registers[life.slot * REGISTER_COUNT] = (
+                population.memory[life.slot * MEMORY_SIZE + address]
+            )
+            return skip_ip
+
+    elif opcode == STORE_R0:
+        address = operand % MEMORY_SIZE
+
+        def handler(life, context):
+            population = life.population
+            population.memory[life.slot * MEMORY_SIZE + address] = (
+                population.registers[life.slot * REGISTER_COUNT]
+            )
+            return skip_ip
+
+    elif opcode == JUMP:
+        return _advance(operand % n)
+
+    elif opcode == JUMP_IF_R0_ZERO:
+        target = operand % n
+
+        def handler(life, context):
+            if life.population.registers[life.slot * REGISTER_COUNT] == 0.0:
+                return target
+            return skip_ip
+
+    elif opcode == JUMP_IF_R0_NZ:
+        target = operand % n
+
+        def handler(life, context):
+            if life.population.registers[life.slot * REGISTER_COUNT] != 0.0:
+                return target
+            return skip_ip
+
+    else:
+        # NOP and unassigned opcodes fall through to the next instruction.
+        return _advance(next_ip)
+
+    return handler
+
+
+def compile_genome(genome) -> CompiledProgram:
+    opcodes = tuple(genome)
+    handlers = [_compile_instruction(opcodes, ip) for ip in range(len(opcodes))]
+    return CompiledProgram(opcodes, handlers)
+
+
+class ProgramCache:
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.programs: OrderedDict[tuple[int, ...], CompiledProgram] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, genome) -> CompiledProgram:
+        key = tuple(genome)
+        program = self.programs.get(key)
+
+        if program is not None:
+            self.programs.move_to_end(key)
+            self.hits += 1
+            return program
+
+        self.misses += 1
+        program = compile_genome(key)
+        self.programs[key] = program
+        if len(self.programs) > self.max_size:
+            self.programs.popitem(last=False)
+        return program
+
+    def clear(self) -> None:
+        self.programs.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.programs)
+
+
+program_cache = ProgramCache(config.PROGRAM_CACHE_SIZE)
\ No newline at end of file
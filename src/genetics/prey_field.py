@@ -0,0 +1,134 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class PreyField:
+    # For every cell, the smallest Manhattan distance to a prey that lies
+    # within PREDATOR_SEARCH_RADIUS on both axes, which is exactly the prey
+    # set _local_prey_score considers.  Cells with no such prey hold
+    # self.none.
+    #
+    # Adding a prey can only shrink distances, so it is applied eagerly over
+    # its search window.  Removing the last prey from a cell can grow them, so
+    # that window is only marked dirty and each dirty cell is recomputed from
+    # the prey counts the next time it is read.
+    def __init__(self, width: int, height: int, radius: int, prey_weight: float) -> None:
+        self.width = width
+        self.height = height
+        self.radius = radius
+        self.prey_weight = prey_weight
+        self.none = 2 * radius + 1
+
+        offsets = np.abs(np.arange(-radius, radius + 1, dtype="int16"))
+        self.kernel = offsets[:, None] + offsets[None, :]
+
+        self.counts = np.zeros((height, width), dtype="int16")
+        self.distance_grid = np.full((height, width), self.none, dtype="int16")
+        self.dirty = np.zeros((height, width), dtype=bool)
+
+    def _window(self, x: int, y: int):
+        r = self.radius
+        x0 = max(0, x - r)
+        x1 = min(self.width, x + r + 1)
+        y0 = max(0, y - r)
+        y1 = min(self.height, y + r + 1)
+        kernel = self.kernel[y0 - (y - r):y1 - (y - r), x0 - (x - r):x1 - (x - r)]
+        return (slice(y0, y1), slice(x0, x1)), kernel
+
+    def clear(self) -> None:
+        self.counts[...] = 0
+        self.distance_grid[...] = self.none
+        self.dirty[...] = False
+
+    def refresh(self) -> None:
+        self.distance_grid = distance_field(self.counts > 0, self.radius, self.none)
+        self.dirty[...] = False
+
+    def rebuild(self, prey) -> None:
+        self.clear()
+        for organism in prey:
+            self.counts[organism.y, organism.x] += 1
+        self.refresh()
+
+    def add(self, x: int, y: int) -> None:
+        self.counts[y, x] += 1
+        if self.counts[y, x] == 1:
+            window, kernel = self._window(x, y)
+            np.minimum(self.distance_grid[window], kernel, out=self.distance_grid[window])
+
+    def remove(self, x: int, y: int) -> None:
+        self.counts[y, x] -= 1
+        if self.counts[y, x] == 0:
+            window, _ = self._window(x, y)
+            self.dirty[window] = True
+
+    def move(self, old_x: int, old_y: int, new_x: int, new_y: int) -> None:
+        self.add(new_x, new_y)
+        self.remove(old_x, old_y)
+
+    def distance(self, x: int, y: int) -> int:
+        if self.dirty[y, x]:
+            window, kernel = self._window(x, y)
+            distances = kernel[self.counts[window] > 0]
+            value = int(distances.min()) if distances.size else self.none
+            self.distance_grid[y, x] = value
+            self.dirty[y, x] = False
+            return value
+        return int(self.distance_grid[y, x])
+
+    def exists(self, x: int, y: int) -> bool:
+        return self.distance(x, y) < self.none
+
+    def score(self, x: int, y: int) -> float:
+        distance = self.distance(x, y)
+        if distance == 0:
+            return 100.0
+        if distance >= self.none:
+            return 0.0
+        return self.prey_weight / (distance + 1.0)
+
+
+def distance_field(occupied, radius: int, none: int):
+    # The PreyField distances recomputed from a boolean prey occupancy grid
+    # as a separable transform: nearest prey along each row within the
+    # radius, then the best row offset within the radius along each column.
+    # The last two axes are rows and columns, so a stack of grids works too.
+    height, width = occupied.shape[-2:]
+
+    rows = np.full(occupied.shape, none, dtype="int16")
+    for offset in range(-radius, radius + 1):
+        if offset >= 0:
+            target = rows[..., :width - offset]
+            source = occupied[..., offset:]
+        else:
+            target = rows[..., -offset:]
+            source = occupied[..., :width + offset]
+        np.minimum(target, np.where(source, abs(offset), none), out=target)
+
+    field = np.full(occupied.shape, none, dtype="int16")
+    for offset in range(-radius, radius + 1):
+        if offset >= 0:
+            target = field[..., :height - offset, :]
+            source = rows[..., offset:, :]
+        else:
+            target = field[..., -offset:, :]
+            source = rows[..., :height + offset, :]
+        np.minimum(target, source + abs(offset), out=target)
+
+    np.minimum(field, none, out=field)
+    return field
+
+
+def create_prey_field(settings):
+    # The field is dense over the whole world, which defeats the chunked
+    # backend, so sparse worlds fall back to scanning the spatial buckets.
+    if not settings.prey_field_enabled or np is None or settings.grid_backend == "chunked":
+        return None
+    return PreyField(
+        settings.world_width,
+        settings.world_height,
+        settings.predator_search_radius,
+        settings.predator_prey_weight,
+    )
\ No newline at end of file
@@ -0,0 +1,119 @@
+import csv
+from pathlib import Path
+
+import config
+import genetics.opcodes as opcodes
+
+
+OPCODE_NAMES = {
+    value: name for name, value in vars(opcodes).items()
+    if name.isupper() and isinstance(value, int)
+}
+
+SPECIES_SUFFIXES = {config.SPECIES_A: "a", config.SPECIES_B: "b"}
+
+
+def opcode_name(opcode: int) -> str:
+    return OPCODE_NAMES.get(opcode, f"OP_{opcode}")
+
+
+class OpcodeProfiler:
+    # Times individual handlers for every sample_every-th program execution.
+    # Sampling is a plain countdown rather than a random draw, so profiling
+    # never consumes from the simulation's RNG and runs stay reproducible.
+    #
+    # Independently of the sampling, record_tick writes the full per-tick
+    # opcode histogram that vm.execute counts into tick_stats to the file
+    # opened with stream_histogram_to, so it is never held in memory.
+    def __init__(self, sample_every: int | None = None) -> None:
+        if sample_every is None:
+            sample_every = config.OPCODE_PROFILE_SAMPLE_EVERY
+        self.sample_every = max(1, sample_every)
+        self.histogram_file = None
+        self.histogram_writer = None
+        self.histogram_rows: list[list] = []
+        self.flush_interval = 1
+        self.reset()
+
+    def reset(self) -> None:
+        self.countdown = self.sample_every
+        self.calls: dict[tuple[int, int], int] = {}
+        self.time_ns: dict[tuple[int, int], int] = {}
+
+    def should_sample(self) -> bool:
+        self.countdown -= 1
+        if self.countdown:
+            return False
+        self.countdown = self.sample_every
+        return True
+
+    def record(self, species_id: int, opcode: int, elapsed_ns: int) -> None:
+        key = (species_id, opcode)
+        self.calls[key] = self.calls.get(key, 0) + 1
+        self.time_ns[key] = self.time_ns.get(key, 0) + elapsed_ns
+
+    def record_tick(self, tick: int, tick_stats: dict) -> None:
+        if self.histogram_writer is None:
+            return
+        rows = self.histogram_rows
+        for species_id, suffix in SPECIES_SUFFIXES.items():
+            counts = tick_stats.get(f"opcode_counts_{suffix}", {})
+            for opcode in sorted(counts):
+                rows.append([tick, species_id, opcode, opcode_name(opcode), counts[opcode]])
+        if len(rows) >= self.flush_interval:
+            self.flush()
+
+    def stream_histogram_to(self, path, flush_interval: int | None = None) -> None:
+        if flush_interval is None:
+            flush_interval = config.STATS_FLUSH_INTERVAL
+        self.close()
+        output_path = Path(path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = max(1, flush_interval)
+        self.histogram_file = output_path.open("w", newline="", encoding="utf-8")
+        self.histogram_writer = csv.writer(self.histogram_file)
+        self.histogram_writer.writerow(["tick", "species", "opcode", "name", "count"])
+
+    def flush(self) -> None:
+        if self.histogram_writer is None:
+            return
+        if self.histogram_rows:
+            self.histogram_writer.writerows(self.histogram_rows)
+            self.histogram_rows.clear()
+        self.histogram_file.flush()
+
+    def close(self) -> None:
+        if self.histogram_file is None:
+            return
+        self.flush()
+        self.histogram_file.close()
+        self.histogram_file = None
+        self.histogram_writer = None
+
+    def summary(self) -> list[dict]:
+        # One row per species and opcode, most expensive first.  Sampled
+        # figures are also scaled by sample_every to estimate the full run.
+        rows = []
+        for (species_id, opcode), calls in self.calls.items():
+            total = self.time_ns[(species_id, opcode)]
+            rows.append({
+                "species": species_id,
+                "opcode": opcode,
+                "name": opcode_name(opcode),
+                "sampled_calls": calls,
+                "sampled_ns": total,
+                "mean_ns": total / calls,
+                "estimated_ns": total * self.sample_every,
+            })
+        rows.sort(key=lambda row: row["sampled_ns"], reverse=True)
+        return rows
+
+    def export_summary_csv(self, path) -> None:
+        rows = self.summary()
+        output_path = Path(path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        fieldnames = ["species", "opcode", "name", "sampled_calls", "sampled_ns", "mean_ns", "estimated_ns"]
+        with output_path.open("w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
\ No newline at end of file
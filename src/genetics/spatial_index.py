@@ -1,16 +1,145 @@
+import math
+from array import array
+
 import config
 
 
+MIN_BUCKET_SIZE = 4
+MAX_BUCKET_SIZE = 64
+TARGET_BUCKET_OCCUPANCY = 8
+
+
+def _ideal_bucket_side(width: int, height: int, population: int) -> float:
+    # The bucket side that puts roughly TARGET_BUCKET_OCCUPANCY organisms in
+    # each bucket at the current density.
+    if population <= 0:
+        return 16.0
+    return math.sqrt(width * height * TARGET_BUCKET_OCCUPANCY / population)
+
+
+def auto_bucket_size(width: int, height: int, population: int) -> int:
+    side = _ideal_bucket_side(width, height, population)
+    side = 2 ** round(math.log2(max(1.0, side)))
+    return max(MIN_BUCKET_SIZE, min(MAX_BUCKET_SIZE, side))
+
+
+class SummedAreaTree:
+    # Bucket counts for one species kept as a 2D Fenwick tree, the
+    # incrementally updatable form of a summed-area table: point updates and
+    # rectangle sums both cost O(log width * log height).
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.counts = [0] * (width * height)
+        self.tree = [0] * ((width + 1) * (height + 1))
+
+    def add(self, bx: int, by: int, delta: int) -> None:
+        self.counts[by * self.width + bx] += delta
+        stride = self.width + 1
+        tree = self.tree
+        i = by + 1
+        while i <= self.height:
+            j = bx + 1
+            row = i * stride
+            while j <= self.width:
+                tree[row + j] += delta
+                j += j & -j
+            i += i & -i
+
+    def count(self, bx: int, by: int) -> int:
+        return self.counts[by * self.width + bx]
+
+    def _prefix(self, bx: int, by: int) -> int:
+        stride = self.width + 1
+        tree = self.tree
+        total = 0
+        i = by + 1
+        while i > 0:
+            j = bx + 1
+            row = i * stride
+            while j > 0:
+                total += tree[row + j]
+                j -= j & -j
+            i -= i & -i
+        return total
+
+    def rect(self, bx0: int, by0: int, bx1: int, by1: int) -> int:
+        if bx0 > bx1 or by0 > by1:
+            return 0
+        return (
+            self._prefix(bx1, by1)
+            - self._prefix(bx0 - 1, by1)
+            - self._prefix(bx1, by0 - 1)
+            + self._prefix(bx0 - 1, by0 - 1)
+        )
+
+
 class SpatialIndex:
-    def __init__(self, life_list, bucket_size=16):
-        self.bucket_size = bucket_size
+    # Lives across ticks.  Every list member records its position in the list
+    # through a slot-indexed array, so removal swaps the last member into the
+    # hole instead of searching the list.
+    def __init__(self, population, settings):
+        self.population = population
+        self.width = settings.world_width
+        self.height = settings.world_height
+        self.species_ids = tuple(settings.species_parameters)
+        self.fixed_bucket_size = settings.spatial_bucket_size
+        self.bucket_size = self.fixed_bucket_size or 16
+        self.prey_field = None
+        self._reset_tables()
+
+    def _reset_tables(self):
+        bucket_size = self.bucket_size
+        self.buckets_x = -(-self.width // bucket_size)
+        self.buckets_y = -(-self.height // bucket_size)
+
         self.by_cell = {}
-        self.prey_buckets = {}
+        self.buckets = {species_id: {} for species_id in self.species_ids}
+        self.bucket_trees = {
+            species_id: SummedAreaTree(self.buckets_x, self.buckets_y)
+            for species_id in self.species_ids
+        }
+        self.prey_buckets = self.buckets[config.SPECIES_A]
+        self.cell_positions = array("i", [-1]) * self.population.capacity
+        self.bucket_positions = array("i", [-1]) * self.population.capacity
+
+    def rebuild(self, bucket_size=None):
+        if bucket_size is not None:
+            self.bucket_size = bucket_size
+        elif self.fixed_bucket_size is None:
+            self.bucket_size = auto_bucket_size(
+                self.width,
+                self.height,
+                len(self.population),
+            )
 
-        for organism in life_list:
-            if organism.is_dead():
-                continue
+        self._reset_tables()
+
+        # Positions do not change here, so the prey field stays as it is.
+        prey_field = self.prey_field
+        self.prey_field = None
+        for organism in self.population:
             self.add(organism)
+        self.prey_field = prey_field
+
+    def retune(self):
+        # Rebuilds with a new bucket size once the density has drifted at
+        # least a factor of two away from the current one, so a population
+        # hovering around a threshold does not trigger a rebuild every tick.
+        if self.fixed_bucket_size is not None:
+            return
+
+        width = self.width
+        height = self.height
+        population = len(self.population)
+
+        side = _ideal_bucket_side(width, height, population)
+        if self.bucket_size / 2 <= side <= self.bucket_size * 2:
+            return
+
+        ideal = auto_bucket_size(width, height, population)
+        if ideal != self.bucket_size:
+            self.rebuild(ideal)
 
     def _cell_key(self, x, y):
         return (x, y)
@@ -18,85 +147,148 @@ class SpatialIndex:
     def _bucket_key(self, x, y):
         return (x // self.bucket_size, y // self.bucket_size)
 
+    def _reserve(self, slot):
+        missing = slot + 1 - len(self.cell_positions)
+        if missing > 0:
+            self.cell_positions.extend([-1] * missing)
+            self.bucket_positions.extend([-1] * missing)
+
+    def _attach(self, table, positions, key, organism):
+        members = table.get(key)
+        if members is None:
+            members = table[key] = []
+        positions[organism.slot] = len(members)
+        members.append(organism)
+
+    def _detach(self, table, positions, key, organism):
+        members = table[key]
+        index = positions[organism.slot]
+        last = members.pop()
+        if last is not organism:
+            members[index] = last
+            positions[last.slot] = index
+        positions[organism.slot] = -1
+        if not members:
+            del table[key]
+
+    def _attach_bucket(self, organism, x, y):
+        bucket_key = self._bucket_key(x, y)
+        species_id = organism.species_id
+        self._attach(self.buckets[species_id], self.bucket_positions, bucket_key, organism)
+        self.bucket_trees[species_id].add(bucket_key[0], bucket_key[1], 1)
+
+    def _detach_bucket(self, organism, x, y):
+        bucket_key = self._bucket_key(x, y)
+        species_id = organism.species_id
+        self._detach(self.buckets[species_id], self.bucket_positions, bucket_key, organism)
+        self.bucket_trees[species_id].add(bucket_key[0], bucket_key[1], -1)
+
     def add(self, organism):
         if organism.is_dead():
             return
 
+        self._reserve(organism.slot)
+        if self.cell_positions[organism.slot] >= 0:
+            return
+
         cell_key = self._cell_key(organism.x, organism.y)
-        self.by_cell.setdefault(cell_key, []).append(organism)
+        self._attach(self.by_cell, self.cell_positions, cell_key, organism)
+        self._attach_bucket(organism, organism.x, organism.y)
 
-        if organism.species_id == config.SPECIES_A:
-            bucket_key = self._bucket_key(organism.x, organism.y)
-            self.prey_buckets.setdefault(bucket_key, []).append(organism)
+        if self.prey_field is not None and organism.species_id == config.SPECIES_A:
+            self.prey_field.add(organism.x, organism.y)
 
     def remove(self, organism):
+        slot = organism.slot
+        if slot >= len(self.cell_positions) or self.cell_positions[slot] < 0:
+            return
+
         cell_key = self._cell_key(organism.x, organism.y)
-        occupants = self.by_cell.get(cell_key)
-        if occupants is not None:
-            if organism in occupants:
-                occupants.remove(organism)
-            if not occupants:
-                del self.by_cell[cell_key]
-
-        if organism.species_id == config.SPECIES_A:
-            bucket_key = self._bucket_key(organism.x, organism.y)
-            prey_list = self.prey_buckets.get(bucket_key)
-            if prey_list is not None:
-                if organism in prey_list:
-                    prey_list.remove(organism)
-                if not prey_list:
-                    del self.prey_buckets[bucket_key]
+        self._detach(self.by_cell, self.cell_positions, cell_key, organism)
+        self._detach_bucket(organism, organism.x, organism.y)
+
+        if self.prey_field is not None and organism.species_id == config.SPECIES_A:
+            self.prey_field.remove(organism.x, organism.y)
 
     def move(self, organism, old_x, old_y, new_x, new_y):
         if old_x == new_x and old_y == new_y:
             return
 
-        old_cell_key = self._cell_key(old_x, old_y)
-        new_cell_key = self._cell_key(new_x, new_y)
+        slot = organism.slot
+        if self.cell_positions[slot] < 0:
+            return
+
+        self._detach(self.by_cell, self.cell_positions, self._cell_key(old_x, old_y), organism)
+        self._attach(self.by_cell, self.cell_positions, self._cell_key(new_x, new_y), organism)
+
+        if self._bucket_key(old_x, old_y) != self._bucket_key(new_x, new_y):
+            self._detach_bucket(organism, old_x, old_y)
+            self._attach_bucket(organism, new_x, new_y)
+
+        if self.prey_field is not None and organism.species_id == config.SPECIES_A:
+            self.prey_field.move(old_x, old_y, new_x, new_y)
+
+    def __len__(self):
+        return sum(len(occupants) for occupants in self.by_cell.values())
+
+    def bucket_count(self, species_id, bx, by):
+        return self.bucket_trees[species_id].count(bx, by)
+
+    def _covered_buckets(self, lo, hi, limit):
+        # The range of buckets lying entirely inside [lo, hi] on one axis.  The
+        # last bucket may be cut short by the world edge, so reaching the edge
+        # covers it.
+        size = self.bucket_size
+        first = -(-lo // size)
+        last = (hi + 1) // size - 1
+        if hi >= limit - 1:
+            last = (limit - 1) // size
+        return first, last
+
+    def _scan_rect(self, species_id, x0, y0, x1, y1, stop_at_first):
+        # Counts members of the given species inside the rectangle, taking
+        # whole buckets from the tree and checking members individually only
+        # in the buckets cut by the rectangle's border.
+        if x0 > x1 or y0 > y1:
+            return 0
 
-        occupants = self.by_cell.get(old_cell_key)
-        if occupants is not None:
-            if organism in occupants:
-                occupants.remove(organism)
-            if not occupants:
-                del self.by_cell[old_cell_key]
+        size = self.bucket_size
+        fx0, fx1 = self._covered_buckets(x0, x1, self.width)
+        fy0, fy1 = self._covered_buckets(y0, y1, self.height)
 
-        self.by_cell.setdefault(new_cell_key, []).append(organism)
+        total = self.bucket_trees[species_id].rect(fx0, fy0, fx1, fy1)
+        if total and stop_at_first:
+            return total
 
-        if organism.species_id == config.SPECIES_A:
-            old_bucket_key = self._bucket_key(old_x, old_y)
-            new_bucket_key = self._bucket_key(new_x, new_y)
+        buckets = self.buckets[species_id]
+        for by in range(y0 // size, y1 // size + 1):
+            inner_row = fy0 <= by <= fy1
+            for bx in range(x0 // size, x1 // size + 1):
+                if inner_row and fx0 <= bx <= fx1:
+                    continue
+                for organism in buckets.get((bx, by), ()):
+                    if x0 <= organism.x <= x1 and y0 <= organism.y <= y1:
+                        total += 1
+                        if stop_at_first:
+                            return total
+        return total
 
-            if old_bucket_key != new_bucket_key:
-                prey_list = self.prey_buckets.get(old_bucket_key)
-                if prey_list is not None:
-                    if organism in prey_list:
-                        prey_list.remove(organism)
-                    if not prey_list:
-                        del self.prey_buckets[old_bucket_key]
+    def count_in_rect(self, species_id, x0, y0, x1, y1):
+        x0 = max(0, x0)
+        y0 = max(0, y0)
+        x1 = min(self.width - 1, x1)
+        y1 = min(self.height - 1, y1)
+        return self._scan_rect(species_id, x0, y0, x1, y1, stop_at_first=False)
 
-                self.prey_buckets.setdefault(new_bucket_key, []).append(organism)
+    def exists_in_range(self, species_id, x, y, vision_range):
+        x0 = max(0, x - vision_range)
+        y0 = max(0, y - vision_range)
+        x1 = min(self.width - 1, x + vision_range)
+        y1 = min(self.height - 1, y + vision_range)
+        return self._scan_rect(species_id, x0, y0, x1, y1, stop_at_first=True) > 0
 
     def alive_same_cell_count(self, x, y):
-        count = 0
-        for organism in self.by_cell.get((x, y), []):
-            if not organism.is_dead():
-                count += 1
-        return count
+        return len(self.by_cell.get((x, y), ()))
 
     def prey_exists_in_range(self, x, y, vision_range):
-        bx0 = max(0, (x - vision_range) // self.bucket_size)
-        bx1 = (x + vision_range) // self.bucket_size
-        by0 = max(0, (y - vision_range) // self.bucket_size)
-        by1 = (y + vision_range) // self.bucket_size
-
-        for by in range(by0, by1 + 1):
-            for bx in range(bx0, bx1 + 1):
-                for prey in self.prey_buckets.get((bx, by), []):
-                    if prey.is_dead():
-                        continue
-                    dx = prey.x - x
-                    dy = prey.y - y
-                    if abs(dx) <= vision_range and abs(dy) <= vision_range:
-                        return True
-        return False
\ No newline at end of file
+        return self.exists_in_range(config.SPECIES_A, x, y, vision_range)
\ No newline at end of file
@@ -1,42 +1,145 @@
 import sys
 sys.dont_write_bytecode = True
 
+import argparse
+import multiprocessing
 import time
 import config
+from core.settings import Settings
 from core.simulator import GenesisSimulator
+from ui.playback import Playback
 from ui.window import GenesisWindow
 from ui.terminal import TerminalStatsPanel
 
-def main() -> None:
-    sim = GenesisSimulator()
+def run_serial(settings: Settings) -> None:
+    sim = GenesisSimulator(settings)
     sim.reset()
 
     window = GenesisWindow()
-    window.render(sim.life_list, sim.food_grid)
+    window.render(sim.population, sim.food_grid)
     panel = TerminalStatsPanel()
+    playback = Playback()
 
     try:
         while sim.running and sim.tick < config.MAX_TICK_COUNT:
             if not window.process_events():
                 break
+            for key in window.key_presses:
+                playback.handle_key(key)
 
-            sim.step()
+            ticks = playback.ticks_this_frame()
+            started = time.perf_counter()
+            stepped = 0
+            while stepped < ticks and sim.running and sim.tick < config.MAX_TICK_COUNT:
+                sim.step()
+                stepped += 1
+                if sim.is_extinct():
+                    break
 
-            if sim.stats.history:
-                panel.render(sim.stats.history[-1])
+            if stepped:
+                playback.record_steps(stepped, time.perf_counter() - started)
 
-            window.render(sim.life_list, sim.food_grid)
+                started = time.perf_counter()
+                if sim.stats.history:
+                    panel.render(sim.stats.history[-1])
+                window.render(sim.population, sim.food_grid)
+                playback.record_render(time.perf_counter() - started)
+
+            window.set_status(playback.status())
 
             if sim.is_extinct():
                 print("All organisms died, simulation terminated.")
                 break
 
-            time.sleep(config.TICK_DELAY_SECONDS)
+            delay = playback.delay()
+            if delay > 0:
+                time.sleep(delay)
         else:
             print(f"Reached maximum tick count {config.MAX_TICK_COUNT}, simulation terminated.")
     finally:
         window.close()
 
+def run_separate_process(settings: Settings) -> None:
+    # The simulator steps in a worker process and publishes every tick into
+    # a shared frame buffer; this process only draws the newest frame, at
+    # most FRAME_RATE times per second.
+    from core.frames import (
+        FINISHED_EXTINCT,
+        FINISHED_MAX_TICKS,
+        SharedFrameBuffer,
+        run_simulation_worker,
+    )
+
+    max_organisms = config.FRAME_MAX_ORGANISMS
+
+    buffer = SharedFrameBuffer.create(settings.world_width, settings.world_height, max_organisms)
+    stop_event = multiprocessing.Event()
+    worker = multiprocessing.Process(
+        target=run_simulation_worker,
+        args=(buffer.name, settings, max_organisms, stop_event),
+        daemon=True,
+    )
+
+    window = GenesisWindow()
+    panel = TerminalStatsPanel()
+    worker.start()
+
+    try:
+        last_tick = -1
+        while window.process_events():
+            finished = buffer.finished
+            frame = buffer.read()
+
+            if frame is not None and frame.tick != last_tick:
+                last_tick = frame.tick
+                if frame.snapshot is not None:
+                    panel.render(frame.snapshot)
+                window.render(frame, frame.food_grid)
+
+            if finished == FINISHED_EXTINCT:
+                print("All organisms died, simulation terminated.")
+                break
+            if finished == FINISHED_MAX_TICKS:
+                print(f"Reached maximum tick count {config.MAX_TICK_COUNT}, simulation terminated.")
+                break
+            if not worker.is_alive():
+                print("Simulation process exited unexpectedly.")
+                break
+
+            time.sleep(1.0 / config.FRAME_RATE)
+    finally:
+        stop_event.set()
+        worker.join(timeout=5)
+        window.close()
+        buffer.close()
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the Genesis simulation with a window.")
+    parser.add_argument(
+        "--separate-process",
+        action="store_true",
+        default=config.SEPARATE_SIMULATION_PROCESS,
+        help="step the simulation in a worker process (requires numpy)",
+    )
+    parser.add_argument(
+        "--config",
+        default=None,
+        help="JSON or TOML file overriding the simulation settings in config.py",
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    if args.config is not None:
+        settings = Settings.from_file(args.config)
+    else:
+        settings = Settings.from_config()
+
+    if args.separate_process:
+        run_separate_process(settings)
+    else:
+        run_serial(settings)
+
 if __name__ == "__main__":
     try:
         main()
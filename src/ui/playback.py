@@ -0,0 +1,72 @@
+import pygame
+import config
+
+
+# Weight of the newest measurement in the step and render time averages.
+SMOOTHING = 0.2
+
+
+class Playback:
+    # Keyboard controlled pacing of the visual runner:
+    #   space        pause / resume
+    #   right, "."   advance one tick while paused
+    #   f            toggle fast-forward
+    #
+    # In fast-forward the runner does not sleep and steps as many ticks per
+    # frame as fit in the frame budget (1 / FRAME_RATE) next to the measured
+    # render time.
+    def __init__(self) -> None:
+        self.paused = False
+        self.fast_forward = False
+        self.pending_steps = 0
+        self.step_seconds = 0.0
+        self.render_seconds = 0.0
+
+    def handle_key(self, key: int) -> None:
+        if key == pygame.K_SPACE:
+            self.paused = not self.paused
+        elif key in (pygame.K_RIGHT, pygame.K_PERIOD):
+            if self.paused:
+                self.pending_steps += 1
+        elif key == pygame.K_f:
+            self.fast_forward = not self.fast_forward
+
+    def ticks_per_frame(self) -> int:
+        if not self.fast_forward or self.step_seconds <= 0.0:
+            return 1
+        budget = 1.0 / config.FRAME_RATE - self.render_seconds
+        ticks = int(budget / self.step_seconds)
+        return max(1, min(config.FAST_FORWARD_MAX_TICKS_PER_FRAME, ticks))
+
+    def ticks_this_frame(self) -> int:
+        if self.paused:
+            ticks = self.pending_steps
+            self.pending_steps = 0
+            return ticks
+        return self.ticks_per_frame()
+
+    def _smooth(self, average: float, value: float) -> float:
+        if average <= 0.0:
+            return value
+        return average + SMOOTHING * (value - average)
+
+    def record_steps(self, ticks: int, seconds: float) -> None:
+        self.step_seconds = self._smooth(self.step_seconds, seconds / ticks)
+
+    def record_render(self, seconds: float) -> None:
+        self.render_seconds = self._smooth(self.render_seconds, seconds)
+
+    def delay(self) -> float:
+        # Seconds to sleep after a frame.
+        if self.paused:
+            return 1.0 / config.FRAME_RATE
+        if self.fast_forward:
+            return 0.0
+        return config.TICK_DELAY_SECONDS
+
+    def status(self) -> str:
+        if self.paused:
+            return "paused"
+        if self.fast_forward:
+            return f"fast-forward x{self.ticks_per_frame()}"
+        return ""
\ No newline at end of file
@@ -0,0 +1,24 @@
+import threading
+
+
+class ThemeWatcher:
+    # Polls a dark mode detector on a daemon thread.  The detectors spawn
+    # subprocesses that can take up to their timeout, so the render loop only
+    # ever reads dark_mode, which the thread replaces with a single
+    # assignment.
+    def __init__(self, detect, interval: float, dark_mode: bool) -> None:
+        self.detect = detect
+        self.interval = interval
+        self.dark_mode = dark_mode
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="theme-watcher", daemon=True)
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def _run(self) -> None:
+        while not self.stop_event.wait(self.interval):
+            self.dark_mode = self.detect()
+
+    def stop(self) -> None:
+        self.stop_event.set()
\ No newline at end of file
@@ -5,26 +5,65 @@ import re
 import shutil
 import subprocess
 import sys
-import time
 import pygame
 import config
+from core.world import dense_food_grid, is_array_grid
+from ui.theme import ThemeWatcher
 from typing import Optional
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Cell codes of a rendered frame, indexing into GenesisWindow.palette.
+CELL_EMPTY = 0
+CELL_FOOD = 1
+CELL_SPECIES_A = 2
+CELL_SPECIES_B = 3
+
 
 class GenesisWindow:
+    # Changed cells up to which a frame is drawn cell by cell.
+    FILL_LIMIT = 2048
+
     def __init__(self, size: int = 500) -> None:
         pygame.init()
         pygame.display.set_caption("Genesis")
         self.screen = pygame.display.set_mode((size, size), pygame.RESIZABLE)
         self.world_surface = None
+        # The frame at screen size, kept between frames so only the part
+        # covering changed cells is rescaled.
+        self.scaled_surface = None
+        # The first screen column of every world column, and the first
+        # screen row of every world row, with one extra entry at the end.
+        self.column_starts = None
+        self.row_starts = None
         self.world_width = 0
         self.world_height = 0
+        # Cell codes of the frame currently on screen, None forces a full
+        # redraw.
+        self.frame = None
+        self.screen_side = 0
+        # Keys pressed since the last process_events call.
+        self.key_presses = []
+        self.status = ""
         self.species_a = (0, 255, 0)
         self.species_b = (255, 0, 0)
-        self.is_dark_mode = self._detect_dark_mode()
+        self.theme_watcher = None
+        if config.THEME_MODE == "auto":
+            self.is_dark_mode = self._detect_dark_mode()
+            if config.THEME_POLL_INTERVAL > 0:
+                self.theme_watcher = ThemeWatcher(
+                    self._detect_dark_mode,
+                    config.THEME_POLL_INTERVAL,
+                    self.is_dark_mode,
+                )
+                self.theme_watcher.start()
+        else:
+            self.is_dark_mode = config.THEME_MODE == "dark"
         self._apply_theme(self.is_dark_mode)
-        self.last_theme_check = 0.0
-        self.theme_check_interval = 1.0
 
     def _detect_dark_mode(self) -> bool:
         if sys.platform == "darwin":
@@ -160,13 +199,17 @@ class GenesisWindow:
         else:
             self.background = (255, 255, 255)
             self.food = (210, 210, 210)
+        if np is not None:
+            self.palette = np.array(
+                [self.background, self.food, self.species_a, self.species_b],
+                dtype=np.uint8,
+            )
+        self.frame = None
 
     def _refresh_theme(self) -> None:
-        now = time.time()
-        if now - self.last_theme_check < self.theme_check_interval:
+        if self.theme_watcher is None:
             return
-        self.last_theme_check = now
-        dark_mode = self._detect_dark_mode()
+        dark_mode = self.theme_watcher.dark_mode
         if dark_mode != self.is_dark_mode:
             self.is_dark_mode = dark_mode
             self._apply_theme(dark_mode)
@@ -176,28 +219,118 @@ class GenesisWindow:
             self.world_width = width
             self.world_height = height
             self.world_surface = pygame.Surface((width, height))
+            self.frame = None
+
+    def set_status(self, status: str) -> None:
+        if status != self.status:
+            self.status = status
+            pygame.display.set_caption(f"Genesis - {status}" if status else "Genesis")
 
     def process_events(self) -> bool:
+        self.key_presses = []
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return False
+            if event.type == pygame.KEYDOWN:
+                self.key_presses.append(event.key)
             if event.type == pygame.VIDEORESIZE:
                 side = min(event.w, event.h)
                 self.screen = pygame.display.set_mode((side, side), pygame.RESIZABLE)
         return True
 
-    def render(self, life_list, food_grid) -> None:
-        self._refresh_theme()
+    def _cell_codes(self, organisms, food_grid, width: int, height: int):
+        # The frame as one cell code per world cell, indexed [x, y] like
+        # pygame.surfarray.  Organisms are scattered over the food layer.
+        if is_array_grid(food_grid):
+            food = food_grid
+        else:
+            food = np.array(food_grid, dtype=np.int16)
+        codes = np.ascontiguousarray((food > 0).T, dtype=np.uint8)
 
-        height = len(food_grid)
-        width = len(food_grid[0]) if height > 0 else 0
+        if hasattr(organisms, "positions"):
+            xs, ys, species = organisms.positions()
+        else:
+            alive = [o for o in organisms if not o.is_dead()]
+            xs = np.array([o.x for o in alive], dtype=np.int32)
+            ys = np.array([o.y for o in alive], dtype=np.int32)
+            species = np.array([o.species_id for o in alive], dtype=np.int8)
+
+        # One scatter in population order, so as with drawing one organism at
+        # a time the last organism on a cell decides its color.
+        is_a = species == config.SPECIES_A
+        selected = (
+            (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+            & (is_a | (species == config.SPECIES_B))
+        )
+        codes[xs[selected], ys[selected]] = np.where(
+            is_a[selected], CELL_SPECIES_A, CELL_SPECIES_B
+        )
+        return codes
+
+    def _draw_cells(self, organisms, food_grid, width: int, height: int, side: int):
+        # Redraws the cells that differ from the frame on screen straight
+        # into the scaled surface and returns the screen Rect covering them,
+        # or None when nothing changed.  A few changed cells are filled as
+        # screen rectangles; a full redraw or a large change rescales the
+        # box around them through a pixel array.
+        codes = self._cell_codes(organisms, food_grid, width, height)
+        previous = self.frame
+        self.frame = codes
+
+        if previous is None or previous.shape != codes.shape:
+            size = (side, side)
+            if self.scaled_surface is None or self.scaled_surface.get_size() != size:
+                self.scaled_surface = pygame.Surface(size)
+            column_cells = np.arange(side) * width // side
+            row_cells = np.arange(side) * height // side
+            self.column_starts = np.searchsorted(column_cells, np.arange(width + 1))
+            self.row_starts = np.searchsorted(row_cells, np.arange(height + 1))
+            return self._scale_box(codes, 0, 0, width, height)
+
+        changed = codes != previous
+        xs, ys = np.nonzero(changed)
+        if not xs.size:
+            return None
+        if xs.size > self.FILL_LIMIT:
+            return self._scale_box(
+                codes, int(xs.min()), int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1
+            )
 
-        if width == 0 or height == 0:
-            self.screen.fill(self.background)
-            pygame.display.flip()
-            return
+        colors = self.palette.tolist()
+        column_starts = self.column_starts.tolist()
+        row_starts = self.row_starts.tolist()
+        fill = self.scaled_surface.fill
+        for x, y, code in zip(xs.tolist(), ys.tolist(), codes[xs, ys].tolist()):
+            sx = column_starts[x]
+            sy = row_starts[y]
+            fill(colors[code], (sx, sy, column_starts[x + 1] - sx, row_starts[y + 1] - sy))
+
+        sx0 = column_starts[int(xs.min())]
+        sy0 = row_starts[int(ys.min())]
+        return pygame.Rect(
+            sx0,
+            sy0,
+            column_starts[int(xs.max()) + 1] - sx0,
+            row_starts[int(ys.max()) + 1] - sy0,
+        )
+
+    def _scale_box(self, codes, x0: int, y0: int, x1: int, y1: int):
+        # Each cell of the box is repeated over the screen columns and rows
+        # showing it, the same pixels pygame.transform.scale would produce.
+        sx0, sx1 = int(self.column_starts[x0]), int(self.column_starts[x1])
+        sy0, sy1 = int(self.row_starts[y0]), int(self.row_starts[y1])
+        if sx0 == sx1 or sy0 == sy1:
+            return None
+
+        colors = self.palette[codes[x0:x1, y0:y1]]
+        colors = np.repeat(colors, np.diff(self.column_starts[x0:x1 + 1]), axis=0)
+        colors = np.repeat(colors, np.diff(self.row_starts[y0:y1 + 1]), axis=1)
+        pixels = pygame.surfarray.pixels3d(self.scaled_surface)
+        pixels[sx0:sx1, sy0:sy1] = colors
+        del pixels
+        return pygame.Rect(sx0, sy0, sx1 - sx0, sy1 - sy0)
 
-        self._ensure_world_surface(width, height)
+    def _draw_cells_slow(self, organisms, food_grid, width: int, height: int):
         self.world_surface.fill(self.background)
 
         for y in range(height):
@@ -206,7 +339,7 @@ class GenesisWindow:
                 if row[x] > 0:
                     self.world_surface.set_at((x, y), self.food)
 
-        for organism in life_list:
+        for organism in organisms:
             if organism.is_dead():
                 continue
 
@@ -219,17 +352,49 @@ class GenesisWindow:
                 elif organism.species_id == config.SPECIES_B:
                     self.world_surface.set_at((x, y), self.species_b)
 
+    def render(self, organisms, food_grid) -> None:
+        # organisms is the simulator's Population, whose positions are read
+        # in bulk, or any iterable of organisms.
+        self._refresh_theme()
+
+        food_grid = dense_food_grid(food_grid)
+        height = len(food_grid)
+        width = len(food_grid[0]) if height > 0 else 0
+
+        if width == 0 or height == 0:
+            self.screen.fill(self.background)
+            pygame.display.flip()
+            return
+
         window_width, window_height = self.screen.get_size()
         side = min(window_width, window_height)
 
         if window_width != side or window_height != side:
             self.screen = pygame.display.set_mode((side, side), pygame.RESIZABLE)
+        if side != self.screen_side:
+            self.screen_side = side
+            self.frame = None
+
+        if np is not None:
+            target = self._draw_cells(organisms, food_grid, width, height, side)
+        else:
+            self._ensure_world_surface(width, height)
+            self._draw_cells_slow(organisms, food_grid, width, height)
+            self.scaled_surface = pygame.transform.scale(self.world_surface, (side, side))
+            target = self.scaled_surface.get_rect()
 
-        scaled = pygame.transform.scale(self.world_surface, (side, side))
+        if target is None:
+            return
 
-        self.screen.fill(self.background)
-        self.screen.blit(scaled, (0, 0))
-        pygame.display.flip()
+        # Only the screen area covering changed cells is blitted and pushed
+        # to the display.
+        self.screen.blit(self.scaled_surface, target.topleft, target)
+        if target.size == (side, side):
+            pygame.display.flip()
+        else:
+            pygame.display.update(target)
 
     def close(self) -> None:
+        if self.theme_watcher is not None:
+            self.theme_watcher.stop()
         pygame.quit()
\ No newline at end of file
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The simulation modules import each other as top level packages from src.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
\ No newline at end of file
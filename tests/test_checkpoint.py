@@ -0,0 +1,65 @@
+import pytest
+
+from core.checkpoint import fork_checkpoint, load_checkpoint, save_checkpoint
+from core.settings import Settings
+from core.simulator import GenesisSimulator
+
+
+def _settings(backend: str) -> Settings:
+    if backend != "list":
+        pytest.importorskip("numpy")
+    # Small tiles leave most of a chunked grid waiting, some of it for
+    # longer than the replayed ticks.
+    return Settings.from_config(grid_backend=backend, chunk_size=16)
+
+
+def _rows(sim) -> list[tuple]:
+    return [tuple(vars(record).values()) for record in sim.stats.history]
+
+
+def _stepped(sim, ticks: int):
+    for _ in range(ticks):
+        sim.step()
+    return sim
+
+
+@pytest.mark.parametrize("backend", ["list", "numpy", "chunked"])
+@pytest.mark.parametrize("compress", [True, False])
+def test_resume_matches_an_uninterrupted_run(tmp_path, backend, compress):
+    settings = _settings(backend)
+    uninterrupted = GenesisSimulator(settings)
+    uninterrupted.reset(7)
+    _stepped(uninterrupted, 80)
+
+    sim = GenesisSimulator(settings)
+    sim.reset(7)
+    _stepped(sim, 35)
+    path = tmp_path / "run.ckpt"
+    save_checkpoint(sim, path, compress)
+
+    resumed = _stepped(load_checkpoint(path), 45)
+    assert resumed.tick == uninterrupted.tick
+    assert _rows(resumed) == _rows(uninterrupted)
+
+
+@pytest.mark.parametrize("backend", ["list", "chunked"])
+def test_forks_share_the_checkpoint_and_then_diverge(tmp_path, backend):
+    sim = GenesisSimulator(_settings(backend))
+    sim.reset(7)
+    _stepped(sim, 20)
+    path = tmp_path / "run.ckpt"
+    save_checkpoint(sim, path)
+
+    first, second, again = (_stepped(fork, 15) for fork in fork_checkpoint(path, [1, 2, 1]))
+    assert _rows(first)[:20] == _rows(sim)
+    assert _rows(first) == _rows(again)
+    assert _rows(first) != _rows(second)
+
+
+def test_settings_must_keep_the_world_shape(tmp_path):
+    sim = GenesisSimulator(_settings("list"))
+    sim.reset(7)
+    path = tmp_path / "run.ckpt"
+    save_checkpoint(sim, path)
+    with pytest.raises(ValueError):
+        load_checkpoint(path, Settings.from_config(grid_backend="list", world_width=50))
\ No newline at end of file
@@ -0,0 +1,75 @@
+import pytest
+
+import core.rng as rng
+from core.rng import ACT, FOOD, SPAWN, WORLD, RngStreams, Stream, mix64
+from core.settings import Settings
+from core.simulator import GenesisSimulator
+
+
+def _draws(stream: Stream, count: int = 8) -> list[int]:
+    return [stream.next64() for _ in range(count)]
+
+
+def _rows(sim) -> list[tuple]:
+    return [tuple(vars(record).values()) for record in sim.stats.history]
+
+
+def test_mix64_is_the_splitmix64_finalizer():
+    assert mix64(0) == 0
+    assert mix64(1) == 0x5692161D100B05E5
+
+
+def test_streams_repeat_for_the_same_key():
+    streams = RngStreams(42)
+    assert _draws(streams.stream(3, 7, ACT)) == _draws(RngStreams(42).stream(3, 7, ACT))
+
+
+def test_a_stream_is_its_key_and_counter():
+    stream = RngStreams(42).stream(3, 7, ACT)
+    first = _draws(stream, 5)
+    resumed = Stream(stream.key)
+    resumed.counter = 2
+    assert _draws(resumed, 3) == first[2:]
+
+
+@pytest.mark.parametrize("other", [(4, 7, ACT), (3, 8, ACT), (3, 7, SPAWN)])
+def test_tick_ident_and_purpose_separate_streams(other):
+    streams = RngStreams(42)
+    assert _draws(streams.stream(3, 7, ACT)) != _draws(streams.stream(*other))
+
+
+def test_seeds_separate_streams():
+    assert _draws(RngStreams(1).stream(0, WORLD, FOOD)) != _draws(RngStreams(2).stream(0, WORLD, FOOD))
+
+
+def test_hits_match_without_numpy(monkeypatch):
+    pytest.importorskip("numpy")
+    idents = list(range(0, 5000, 3))
+    streams = RngStreams(9)
+    vectorized = streams.hits(12, ACT, idents, 0.3)
+    monkeypatch.setattr(rng, "np", None)
+    assert streams.hits(12, ACT, idents, 0.3) == vectorized
+    assert 0.25 < len(vectorized) / len(idents) < 0.35
+
+
+def test_numpy_generators_repeat_for_the_same_key():
+    np = pytest.importorskip("numpy")
+    first = RngStreams(5).numpy_generator(2, WORLD, FOOD).random(16)
+    second = RngStreams(5).numpy_generator(2, WORLD, FOOD).random(16)
+    assert np.array_equal(first, second)
+
+
+@pytest.mark.parametrize("backend", ["list", "numpy", "chunked"])
+def test_runs_repeat_for_the_same_seed(backend):
+    if backend != "list":
+        pytest.importorskip("numpy")
+    settings = Settings.from_config(grid_backend=backend)
+    runs = []
+    for seed in (3, 3, 4):
+        sim = GenesisSimulator(settings)
+        sim.reset(seed)
+        for _ in range(30):
+            sim.step()
+        runs.append(_rows(sim))
+    assert runs[0] == runs[1]
+    assert runs[0] != runs[2]
\ No newline at end of file
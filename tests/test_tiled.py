@@ -0,0 +1,108 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+import genetics.compiler as compiler
+from core.settings import Settings
+from core.simulator import GenesisSimulator
+from core.tiled import StripSimulator, TiledSimulator
+
+
+SETTINGS = Settings.from_config(grid_backend="numpy", predator_max_step=1)
+
+
+def _rows(sim) -> list[tuple]:
+    return [tuple(vars(record).values()) for record in sim.stats.history]
+
+
+def _tiled(strips: int, seed: int, ticks: int) -> TiledSimulator:
+    sim = TiledSimulator(strips, SETTINGS)
+    try:
+        sim.reset(seed)
+        while sim.running and sim.tick < ticks:
+            sim.step()
+    finally:
+        sim.close()
+    return sim
+
+
+class InProcessTiledSimulator(TiledSimulator):
+    # Steps the strips in this process, where tests can look into them.
+    def _start_workers(self, seed: int) -> None:
+        self.local = [
+            StripSimulator(self.settings, index, self.strips, seed)
+            for index in range(self.strips)
+        ]
+
+    def _call(self, method: str, args_per_worker: list) -> list:
+        if method == "reset":
+            for strip in self.local:
+                strip.reset()
+            return [strip.partial_stats() for strip in self.local]
+        return [getattr(strip, method)(*args) for strip, args in zip(self.local, args_per_worker)]
+
+    def close(self) -> None:
+        pass
+
+
+def test_one_strip_matches_a_serial_run():
+    sim = GenesisSimulator(SETTINGS)
+    sim.reset(11)
+    for _ in range(40):
+        sim.step()
+    assert _rows(_tiled(1, 11, 40)) == _rows(sim)
+
+
+def test_strips_repeat_exactly():
+    assert _rows(_tiled(2, 5, 30)) == _rows(_tiled(2, 5, 30))
+
+
+def test_strips_conserve_organisms():
+    history = list(_tiled(4, 3, 40).stats.history)
+    for before, after in zip(history, history[1:]):
+        assert after.population_total == before.population_total + after.births - after.deaths
+
+
+def test_boundary_food_is_eaten_once(monkeypatch):
+    # Food taken off the strips' own rows each tick has to match what
+    # organisms ate, less the claims refused and charged back to them.
+    eaten = []
+    charged = []
+    owned = {}
+    eat_plant = compiler._eat_plant
+    settle = StripSimulator._settle
+    apply_predation = StripSimulator._apply_predation
+
+    def counting_eat_plant(life, settings, food_grid):
+        consumed = eat_plant(life, settings, food_grid)
+        eaten.append(consumed)
+        return consumed
+
+    def counting_settle(self, claims, food, y0):
+        before = sum(organism.energy for organism in self.population)
+        settle(self, claims, food, y0)
+        after = sum(organism.energy for organism in self.population)
+        charged.append((before - after) / self.settings.food_to_energy_factor)
+
+    def recording_predation(self, spatial):
+        owned[self.index] = int(self.food_grid[self.y0:self.y1].sum())
+        return apply_predation(self, spatial)
+
+    monkeypatch.setattr(compiler, "_eat_plant", counting_eat_plant)
+    monkeypatch.setattr(StripSimulator, "_settle", counting_settle)
+    monkeypatch.setattr(StripSimulator, "_apply_predation", recording_predation)
+
+    # Organisms that eat a whole cell at once make contested cells common.
+    sim = InProcessTiledSimulator(4, SETTINGS.replace(food_consumption_per_event=8))
+    sim.reset(1)
+    refused = 0
+    for _ in range(100):
+        before = sim.food_total
+        eaten.clear()
+        charged.clear()
+        sim.step()
+        if not sim.running:
+            break
+        assert before - sum(owned.values()) == sum(eaten) - round(sum(charged))
+        refused += round(sum(charged))
+    assert refused > 0
\ No newline at end of file
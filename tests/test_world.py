@@ -0,0 +1,73 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from core.settings import Settings
+from core.world import ChunkedFoodGrid, _initial_food, _regenerate_cells
+
+
+SETTINGS = Settings.from_config(grid_backend="chunked")
+
+
+def _probabilities(ticks: int, seed: int = 1) -> list[tuple[float, float, float]]:
+    rng = np.random.default_rng(seed)
+    return [
+        (rng.uniform(0.0, 0.03), SETTINGS.food_decay_probability, rng.uniform(0.0, 0.01))
+        for _ in range(ticks)
+    ]
+
+
+def _replayed(side: int, seed: int, probabilities):
+    # The tile (0, 0) of a grid with that seed, regenerated tick by tick.
+    rng = np.random.default_rng([seed, 0, 0])
+    cells = _initial_food(rng, (side, side)).reshape(-1)
+    for regen_p, decay_p, reseed_p in probabilities:
+        _regenerate_cells(rng, cells, SETTINGS, regen_p, decay_p, reseed_p)
+    return cells
+
+
+def _caught_up(side: int, seed: int, probabilities):
+    grid = ChunkedFoodGrid(side, side, side, seed, SETTINGS)
+    for regen_p, decay_p, reseed_p in probabilities:
+        grid.advance(regen_p, decay_p, reseed_p)
+    return grid, grid.to_array().reshape(-1)
+
+
+def test_short_gaps_replay_every_tick():
+    probabilities = _probabilities(ChunkedFoodGrid.REPLAY_TICKS)
+    _, cells = _caught_up(64, 3, probabilities)
+    assert np.array_equal(cells, _replayed(64, 3, probabilities))
+
+
+def test_long_gaps_match_replay_in_distribution():
+    probabilities = _probabilities(60)
+    _, cells = _caught_up(400, 5, probabilities)
+    replayed = _replayed(400, 6, probabilities)
+
+    states = max(SETTINGS.max_food_units, ChunkedFoodGrid.INITIAL_FOOD_MAX) + 1
+    caught_up = np.bincount(cells, minlength=states) / cells.size
+    expected = np.bincount(replayed, minlength=states) / replayed.size
+    assert np.abs(caught_up - expected).max() < 0.01
+    assert abs(cells.mean() - replayed.mean()) < 0.02
+
+
+def test_history_is_bounded_by_the_waiting_tiles():
+    grid = ChunkedFoodGrid(64, 64, 8, 1, SETTINGS)
+    for tick, (regen_p, decay_p, reseed_p) in enumerate(_probabilities(200)):
+        grid.get(tick % 8 * 8, 0)
+        grid.advance(regen_p, decay_p, reseed_p)
+
+    assert len(grid.regen_p) == ChunkedFoodGrid.REPLAY_TICKS
+    assert set(grid.products) == set(grid.waiting)
+    assert len(grid.products) <= 9
+    assert sum(grid.waiting.values()) == 64
+
+
+def test_total_is_exact_once_every_tile_caught_up():
+    grid = ChunkedFoodGrid(48, 40, 16, 2, SETTINGS)
+    for regen_p, decay_p, reseed_p in _probabilities(30):
+        grid.get(3, 5)
+        grid.advance(regen_p, decay_p, reseed_p)
+
+    cells = grid.to_array()
+    assert grid.total == int(cells.sum())
\ No newline at end of file